@@ -17,9 +17,11 @@ from typing import Optional, List
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Depends, Query, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, StreamingResponse
 import io
+import threading
 import zipfile
 
 # Add parent paths for imports
@@ -29,7 +31,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from core.memory import MemoryManager
-from core.chat import ChatService
+from memvid_memory import load_embedding_model
+from core.chat import ChatService, preload_litellm
 from core.emotions import EmotionsAnalyzer
 from core.auth import get_current_user, get_user_llm_config, CurrentUser
 from core.i18n import t
@@ -74,6 +77,12 @@ async def lifespan(app: FastAPI):
     chat_service = ChatService(memory_manager)
     emotions_analyzer = EmotionsAnalyzer(DATA_DIR)
 
+    # Load the shared embedding model in the background so startup is not blocked
+    # and the first user request does not pay for the model load
+    threading.Thread(target=load_embedding_model, name="embedding-preload", daemon=True).start()
+    # Same for LiteLLM: its import is slow and would otherwise block the event loop on the first chat
+    threading.Thread(target=preload_litellm, name="litellm-preload", daemon=True).start()
+
     print(f"Reminor Backend started - Data dir: {DATA_DIR}")
 
     yield
@@ -225,7 +234,11 @@ async def search_entries(
 ):
     """Search journal entries"""
     user_id = current_user.id
-    results = mm.search(user_id, query.query, limit=query.limit)
+    # Open the user's memory here so it is never created concurrently from a worker thread,
+    # then run the search itself (query embedding + scoring) off the event loop.
+    # MemvidMemory serializes it with concurrent writes through its per-instance lock.
+    mm.get_user_memory(user_id)
+    results = await run_in_threadpool(mm.search, user_id, query.query, query.limit)
 
     return SearchResponse(
         query=query.query,
@@ -908,8 +921,10 @@ async def download_backup_zip(
     with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
         # Add all .txt files from journal directory
         if journal_dir.exists():
-            for txt_file in journal_dir.glob("*.txt"):
-                zf.write(txt_file, f"journal/{txt_file.name}")
+            with os.scandir(journal_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".txt") and entry.is_file():
+                        zf.write(entry.path, f"journal/{entry.name}")
 
         # Add emotions data
         if emotions_data:
@@ -7,7 +7,9 @@ import os
 import json
 import hashlib
 import base64
+import tempfile
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 import uuid
@@ -37,22 +39,67 @@ DATA_DIR = Path(__file__).parent.parent.parent / "data"
 USERS_FILE = DATA_DIR / "users.json"
 
 
-def get_users_db() -> dict:
-    """Load users database from JSON file."""
-    if not USERS_FILE.exists():
-        return {}
+# In-memory copy of users.json, reused until the file's (size, mtime) changes.
+# get_users_db runs on every authenticated request, so this avoids a read + parse each time.
+_users_cache: Optional[dict] = None
+_users_cache_stat: Optional[tuple] = None
+
+
+def _users_file_stat() -> Optional[tuple]:
+    """Return (size, mtime_ns) of users.json, or None if it cannot be stat'ed."""
     try:
-        with open(USERS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
+        st = USERS_FILE.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _copy_users(users: dict) -> dict:
+    """Copy the users dict two levels deep so callers can edit user records without touching the cache."""
+    return {user_id: dict(user_data) for user_id, user_data in users.items()}
+
+
+def get_users_db() -> dict:
+    """Load users database from JSON file (cached in memory until the file changes)."""
+    global _users_cache, _users_cache_stat
+    file_stat = _users_file_stat()
+    if file_stat is None:
         return {}
 
+    if _users_cache is None or file_stat != _users_cache_stat:
+        try:
+            with open(USERS_FILE, "r", encoding="utf-8") as f:
+                users = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+        _users_cache, _users_cache_stat = users, file_stat
+
+    return _copy_users(_users_cache)
+
 
 def save_users_db(users: dict) -> None:
-    """Save users database to JSON file."""
+    """Save users database to JSON file. Skips the write if nothing changed."""
+    global _users_cache, _users_cache_stat
+    if _users_cache is not None and users == _users_cache:
+        if _users_file_stat() == _users_cache_stat:
+            return
+
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(users, f, indent=2, ensure_ascii=False)
+    # Write to a temp file in the same directory and swap it in: readers never see a half-written file
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=DATA_DIR, prefix=".users-", suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = f.name
+            json.dump(users, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, USERS_FILE)
+    except Exception:
+        _users_cache = _users_cache_stat = None
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _users_cache, _users_cache_stat = _copy_users(users), _users_file_stat()
 
 
 # ==================== PASSWORD FUNCTIONS ====================
@@ -187,8 +234,9 @@ def authenticate_user(email: str, password: str) -> Optional[dict]:
 # ==================== API KEY ENCRYPTION ====================
 
 
+@lru_cache(maxsize=1)
 def _get_fernet() -> Fernet:
-    """Derive a Fernet key from JWT_SECRET_KEY."""
+    """Derive a Fernet key from JWT_SECRET_KEY (once: the secret is fixed for the process)."""
     key_bytes = JWT_SECRET_KEY.encode("utf-8")
     # Derive a 32-byte key using SHA256, then base64-encode for Fernet
     derived = hashlib.sha256(key_bytes).digest()
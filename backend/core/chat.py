@@ -5,7 +5,6 @@ Handles AI conversations with journal context using LiteLLM for multi-provider s
 
 import os
 import re
-import litellm
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
@@ -13,8 +12,26 @@ from typing import Dict, List, Optional, Any
 from .memory import MemoryManager
 from .i18n import t, get_list
 
-# Disable LiteLLM telemetry
-litellm.telemetry = False
+_litellm = None
+
+
+def _get_litellm():
+    """Import LiteLLM on first use; it is slow to import and only chat needs it"""
+    global _litellm
+    if _litellm is None:
+        import litellm
+        # Disable LiteLLM telemetry
+        litellm.telemetry = False
+        _litellm = litellm
+    return _litellm
+
+
+def preload_litellm():
+    """Import LiteLLM ahead of the first chat request (run from a startup thread)"""
+    try:
+        _get_litellm()
+    except ImportError as e:
+        print(f"[WARNING] LiteLLM not available: {e}")
 
 
 class ChatService:
@@ -101,7 +118,20 @@ class ChatService:
         Supports both Italian and English date patterns.
         """
         dates = []
-        current_year = datetime.now().year
+        seen = set()
+
+        def add_date(date_str: str) -> None:
+            # Set lookup keeps de-duplication linear in the number of matches
+            if date_str not in seen:
+                seen.add(date_str)
+                dates.append(date_str)
+
+        # Read the clock once so every relative date below agrees, even across midnight
+        now = datetime.now()
+        current_year = now.year
+        current_month = now.month
+        today_str = now.strftime("%Y-%m-%d")
+        yesterday_str = (now - timedelta(days=1)).strftime("%Y-%m-%d")
         query_lower = query.lower()
 
         # Italian month patterns
@@ -144,19 +174,16 @@ class ChatService:
             for day in matches:
                 try:
                     date_str = f"{current_year}-{month:02d}-{int(day):02d}"
-                    if date_str not in dates:
-                        dates.append(date_str)
+                    add_date(date_str)
                 except ValueError:
                     continue
 
         # "il X" pattern - Italian (assumes current month)
         il_pattern = re.findall(r'\bil\s+(\d{1,2})\b', query_lower)
-        current_month = datetime.now().month
         for day in il_pattern:
             try:
                 date_str = f"{current_year}-{current_month:02d}-{int(day):02d}"
-                if date_str not in dates:
-                    dates.append(date_str)
+                add_date(date_str)
             except ValueError:
                 continue
 
@@ -165,32 +192,23 @@ class ChatService:
         for day in the_pattern:
             try:
                 date_str = f"{current_year}-{current_month:02d}-{int(day):02d}"
-                if date_str not in dates:
-                    dates.append(date_str)
+                add_date(date_str)
             except ValueError:
                 continue
 
         # Relative dates - Italian
         if 'ieri' in query_lower:
-            yesterday = datetime.now() - timedelta(days=1)
-            dates.append(yesterday.strftime("%Y-%m-%d"))
+            add_date(yesterday_str)
 
         if any(word in query_lower for word in ['oggi', 'stamattina', 'stasera']):
-            today = datetime.now()
-            dates.append(today.strftime("%Y-%m-%d"))
+            add_date(today_str)
 
         # Relative dates - English
         if 'yesterday' in query_lower:
-            yesterday = datetime.now() - timedelta(days=1)
-            d = yesterday.strftime("%Y-%m-%d")
-            if d not in dates:
-                dates.append(d)
+            add_date(yesterday_str)
 
         if any(word in query_lower for word in ['today', 'this morning', 'tonight']):
-            today = datetime.now()
-            d = today.strftime("%Y-%m-%d")
-            if d not in dates:
-                dates.append(d)
+            add_date(today_str)
 
         return dates
 
@@ -424,6 +442,14 @@ Sei l'AI di Reminor, il compagno digitale che ha letto il diario dell'utente.
         messages.append({"role": "user", "content": message})
 
         # Make API request via LiteLLM
+        try:
+            litellm = _get_litellm()
+        except ImportError as e:
+            return {
+                "response": t("chat.request_error", language, provider=provider, error=str(e)),
+                "error": True
+            }
+
         try:
             response = await litellm.acompletion(
                 model=litellm_model,
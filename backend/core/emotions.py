@@ -30,6 +30,18 @@ class EmotionsAnalyzer:
         "sereno", "stressato", "grato", "motivato"
     ]
 
+    # Keywords for the fallback analysis (built once, not on every call)
+    SIMPLE_KEYWORDS = (
+        ("felice", ("felice", "contento", "gioia", "bene", "fantastico", "ottimo")),
+        ("triste", ("triste", "male", "depresso", "dolore", "piango", "sconforto")),
+        ("arrabbiato", ("arrabbiato", "furioso", "rabbia", "odio", "irritato")),
+        ("ansioso", ("ansioso", "ansia", "preoccupato", "nervoso", "agitato")),
+        ("sereno", ("sereno", "calmo", "tranquillo", "pace", "rilassato")),
+        ("stressato", ("stressato", "stress", "pressione", "sovraccarico")),
+        ("grato", ("grato", "grazie", "riconoscente", "apprezzo", "fortuna")),
+        ("motivato", ("motivato", "determinato", "energia", "voglia", "obiettivo")),
+    )
+
     def __init__(self, data_dir: Path):
         """
         Initialize emotions analyzer.
@@ -173,22 +185,11 @@ class EmotionsAnalyzer:
         text_lower = text.lower()
         emotions = {emotion: 0.0 for emotion in self.EMOTIONS}
 
-        # Simple keyword matching
-        keywords = {
-            "felice": ["felice", "contento", "gioia", "bene", "fantastico", "ottimo"],
-            "triste": ["triste", "male", "depresso", "dolore", "piango", "sconforto"],
-            "arrabbiato": ["arrabbiato", "furioso", "rabbia", "odio", "irritato"],
-            "ansioso": ["ansioso", "ansia", "preoccupato", "nervoso", "agitato"],
-            "sereno": ["sereno", "calmo", "tranquillo", "pace", "rilassato"],
-            "stressato": ["stressato", "stress", "pressione", "sovraccarico"],
-            "grato": ["grato", "grazie", "riconoscente", "apprezzo", "fortuna"],
-            "motivato": ["motivato", "determinato", "energia", "voglia", "obiettivo"]
-        }
-
-        for emotion, words in keywords.items():
-            for word in words:
-                if word in text_lower:
-                    emotions[emotion] = min(emotions[emotion] + 0.3, 1.0)
+        # Simple keyword matching: +0.3 for each keyword found, capped at 1.0
+        for emotion, words in self.SIMPLE_KEYWORDS:
+            matches = sum(1 for word in words if word in text_lower)
+            if matches:
+                emotions[emotion] = min(0.3 * matches, 1.0)
 
         return emotions
 
@@ -4,12 +4,16 @@ Extracts structured knowledge from diary entries to build a persistent knowledge
 """
 
 import os
+import re
 import json
 import requests
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+# Markdown code-fence lines (``` or ```json) wrapped around LLM JSON replies
+_CODE_FENCE_RE = re.compile(r"^```.*(?:\n|$)", re.MULTILINE)
+
 
 class KnowledgeExtractor:
     """
@@ -77,12 +81,17 @@ class KnowledgeExtractor:
     def get_all_entries(self) -> Dict[str, str]:
         """Get all diary entries from journal directory"""
         entries = {}
-        if not self.journal_dir.exists():
+        # One scandir pass instead of exists() + glob(): no Path object per non-matching entry
+        try:
+            with os.scandir(self.journal_dir) as it:
+                names = sorted(e.name for e in it if e.name.endswith(".txt") and e.is_file())
+        except OSError:
             return entries
 
-        for file_path in sorted(self.journal_dir.glob("*.txt")):
+        for name in names:
+            file_path = self.journal_dir / name
             try:
-                date_str = file_path.stem  # filename without extension
+                date_str = name[:-4]  # filename without extension
                 content = file_path.read_text(encoding='utf-8')
                 if content.strip():
                     entries[date_str] = content
@@ -250,20 +259,8 @@ REGOLE:
             # Sometimes LLM wraps it in markdown code blocks
             json_str = response.strip()
             if json_str.startswith("```"):
-                # Remove markdown code blocks
-                lines = json_str.split("\n")
-                json_lines = []
-                in_json = False
-                for line in lines:
-                    if line.startswith("```json"):
-                        in_json = True
-                        continue
-                    elif line.startswith("```"):
-                        in_json = False
-                        continue
-                    if in_json or (not line.startswith("```")):
-                        json_lines.append(line)
-                json_str = "\n".join(json_lines)
+                # Remove markdown code blocks in a single regex pass
+                json_str = _CODE_FENCE_RE.sub("", json_str)
 
             extracted = json.loads(json_str)
 
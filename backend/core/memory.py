@@ -106,14 +106,10 @@ class MemoryManager:
                     end_date: Optional[str] = None) -> Dict[str, str]:
         """Get journal entries within a date range"""
         memory = self.get_user_memory(user_id)
-        entries = memory.entries
-
-        if start_date:
-            entries = {k: v for k, v in entries.items() if k >= start_date}
-        if end_date:
-            entries = {k: v for k, v in entries.items() if k <= end_date}
-
-        return entries
+        if not start_date and not end_date:
+            return memory.entries
+        # Range lookup on the memory's sorted date index instead of scanning every entry
+        return memory.get_entries_in_range(start_date, end_date)
 
     def search(self, user_id: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search user's journal entries"""
@@ -330,13 +326,19 @@ class MemoryManager:
         user_dir = self.get_user_dir(user_id)
         journal_dir = user_dir / "journal"
         memvid_file = user_dir / "memory.mv2"
-        embeddings_file = user_dir / "memory.npz"
+        vector_files = [
+            user_dir / "memory.vec",
+            user_dir / "memory.ids.jsonl",
+            user_dir / "memory.npz",
+            user_dir / "memory.faiss",
+        ]
 
         # Delete existing files to force rebuild
         if memvid_file.exists():
             memvid_file.unlink()
-        if embeddings_file.exists():
-            embeddings_file.unlink()
+        for vector_file in vector_files:
+            if vector_file.exists():
+                vector_file.unlink()
 
         # Create new memory instance (will auto-index all .txt files)
         self._user_memories[user_id] = MemvidMemory(
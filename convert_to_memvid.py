@@ -4,32 +4,22 @@ Script per convertire i file di diario in formato Memvid (.mv2)
 """
 
 import os
-import re
 from pathlib import Path
-from datetime import datetime
 import memvid_sdk
 
+from journal_files import list_journal_files, parse_date_from_filename, read_journal_text
+
 # Configurazione
 JOURNAL_DIR = Path(__file__).parent / "journal"
 OUTPUT_FILE = Path(__file__).parent / "reminor_memory.mv2"
 
-def parse_date_from_filename(filename: str) -> datetime:
-    """Estrae la data dal nome del file (es. 2025-05-21.txt)"""
-    match = re.match(r'(\d{4})-(\d{2})-(\d{2})', filename)
-    if match:
-        return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
-    return datetime.now()
-
 def main():
     print("=" * 60)
     print("  CONVERSIONE DIARIO REMINOR -> MEMVID V2")
     print("=" * 60)
 
     # Trova tutti i file .txt del diario (escludi _emotions.json)
-    journal_files = sorted([
-        f for f in JOURNAL_DIR.glob("*.txt")
-        if f.is_file() and not f.name.startswith(".")
-    ])
+    journal_files = list_journal_files(JOURNAL_DIR)
 
     print(f"\nTrovati {len(journal_files)} file di diario")
 
@@ -52,8 +42,7 @@ def main():
 
     for file_path in journal_files:
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read().strip()
+            content = read_journal_text(file_path)
 
             # Salta file vuoti
             if not content:
@@ -61,9 +50,7 @@ def main():
                 continue
 
             # Estrai data dal nome file
-            entry_date = parse_date_from_filename(file_path.name)
-            date_str = entry_date.strftime("%Y-%m-%d")
-            timestamp = int(entry_date.timestamp())
+            date_str, timestamp = parse_date_from_filename(file_path.name)
 
             # Prepara documento per Memvid
             doc = {
@@ -7,20 +7,70 @@ Usa LiteLLM per supportare qualsiasi provider LLM
 
 import datetime
 import json
+import math
+import os
 import time
 from pathlib import Path
 from collections import defaultdict
 from typing import Dict, List, Optional, Tuple, Any
 import hashlib
+import importlib.util
 
-# Import LiteLLM for multi-provider support
+# LiteLLM per il supporto multi-provider: all'avvio si controlla solo che sia
+# installato, l'import vero (lento) avviene alla prima analisi
+HAS_LITELLM = importlib.util.find_spec("litellm") is not None
+if not HAS_LITELLM:
+    print("[WARNING] LiteLLM non disponibile - analisi emozioni AI disabilitata")
+
+_litellm = None
+
+
+def _get_litellm():
+    """Importa litellm al primo utilizzo e lo riusa per le chiamate successive."""
+    global _litellm
+    if _litellm is None:
+        import litellm
+        litellm.telemetry = False
+        _litellm = litellm
+    return _litellm
+
+
+# orjson (opzionale) per caricare/salvare il profilo più velocemente
 try:
-    import litellm
-    litellm.telemetry = False
-    HAS_LITELLM = True
+    import orjson
+    HAS_ORJSON = True
 except ImportError:
-    HAS_LITELLM = False
-    print("[WARNING] LiteLLM non disponibile - analisi emozioni AI disabilitata")
+    HAS_ORJSON = False
+
+
+def _first_present(d: Dict, keys: Tuple[str, ...], default: Any) -> Any:
+    """Restituisce il primo valore non vuoto tra le chiavi indicate, altrimenti il default"""
+    for key in keys:
+        value = d.get(key)
+        if value:
+            return value
+    return default
+
+
+def _first_number(d: Dict, keys: Tuple[str, ...], default: Any) -> Any:
+    """Come _first_present ma per valori numerici: uno 0 esplicito è un valore valido, si salta solo None"""
+    for key in keys:
+        value = d.get(key)
+        if value is not None:
+            return value
+    return default
+
+
+def _as_float(value: Any, default: Optional[float]) -> Optional[float]:
+    """Converte un valore in float, restituendo il default se non numerico o non finito (nan/inf)"""
+    # bool è una sottoclasse di int: float(True) == 1.0, ma un true/false non è un punteggio
+    if isinstance(value, bool):
+        return default
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return default
+    return result if math.isfinite(result) else default
 
 
 class EnhancedEmotionsAnalyzer:
@@ -39,6 +89,53 @@ class EnhancedEmotionsAnalyzer:
         "deepseek": "deepseek/deepseek-chat",
     }
 
+    # Valori di default per il dashboard quando il profilo non ha ancora dati
+    DEFAULT_STRESS_FACTORS = (
+        {"name": "Lavoro", "value": 0.3},
+        {"name": "Relazioni", "value": 0.2},
+        {"name": "Salute", "value": 0.1},
+        {"name": "Finanze", "value": 0.2},
+        {"name": "Tempo", "value": 0.4},
+    )
+    DEFAULT_EFFECTIVE_STRATEGIES = (
+        {"name": "Meditazione", "value": 0.8},
+        {"name": "Esercizio fisico", "value": 0.7},
+        {"name": "Scrittura", "value": 0.9},
+        {"name": "Socializzare", "value": 0.6},
+        {"name": "Riposo", "value": 0.7},
+    )
+    DEFAULT_KEY_RELATIONSHIPS = (
+        {"name": "Famiglia", "value": 0.8},
+        {"name": "Amici", "value": 0.7},
+        {"name": "Colleghi", "value": 0.6},
+        {"name": "Partner", "value": 0.9},
+        {"name": "Conoscenti", "value": 0.5},
+    )
+
+    # Chiavi inglesi del profilo emotivo -> nomi italiani usati dal dashboard
+    EMOTION_KEY_MAPPING = {
+        'happiness': 'felice',
+        'sadness': 'triste',
+        'anger': 'arrabbiato',
+        'anxiety': 'ansioso',
+        'serenity': 'sereno',
+        'stress': 'stressato',
+        'gratitude': 'grato',
+        'motivation': 'motivato'
+    }
+
+    # Tratti salvati (vecchi e nuovi nomi) -> 5 tratti standard del dashboard
+    TRAIT_MAPPING = {
+        "introversion_tendency": "Estroversione",
+        "stress_response_style": "Stabilità Emotiva",
+        "openness": "Apertura",
+        "conscientiousness": "Coscienziosità",
+        "agreeableness": "Gradevolezza",
+        "extraversion": "Estroversione",
+        "neuroticism": "Stabilità Emotiva",
+        "resilience": "Stabilità Emotiva"
+    }
+
     def __init__(self, journal_dir: Path):
         self.journal_dir = journal_dir
 
@@ -59,6 +156,24 @@ class EnhancedEmotionsAnalyzer:
         self.profile_file = self.journal_dir / "personality_profile.json"
         self.profile_data = self.load_profile()
 
+        # mtime del diario all'ultimo tentativo di analisi (evita rianalisi a vuoto)
+        self._analysis_attempted_mtime = None
+
+    def _scan_journal_files(self) -> List[os.DirEntry]:
+        """File .txt del diario in un solo passaggio os.scandir (tipo e stat dai dati di readdir)"""
+        try:
+            with os.scandir(self.journal_dir) as it:
+                return [entry for entry in it if entry.name.endswith(".txt") and entry.is_file()]
+        except OSError:
+            return []
+
+    def _get_journal_mtime(self) -> float:
+        """Restituisce l'mtime più recente tra i file del diario (0.0 se vuoto)"""
+        try:
+            return max((entry.stat().st_mtime for entry in self._scan_journal_files()), default=0.0)
+        except OSError:
+            return 0.0
+
     def _get_cache_path(self):
         return Path(self.journal_dir) / "enhanced_emotions_cache.json"
 
@@ -87,8 +202,12 @@ class EnhancedEmotionsAnalyzer:
                 "_version": self.cache_version,
                 "entries": self._analysis_cache
             }
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(cache_data, f)
+            # JSON compatto su file temporaneo + os.replace: una cache troncata
+            # andrebbe persa per intero al prossimo avvio
+            tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache_data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
         except Exception as e:
             print(f"Errore salvataggio cache: {e}")
 
@@ -96,8 +215,15 @@ class EnhancedEmotionsAnalyzer:
         """Carica il profilo psicologico esistente"""
         if self.profile_file.exists():
             try:
-                with open(self.profile_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                raw = self.profile_file.read_bytes()
+                if HAS_ORJSON:
+                    try:
+                        return orjson.loads(raw)
+                    except orjson.JSONDecodeError:
+                        # Profili salvati con json.dump possono contenere NaN/Infinity,
+                        # che orjson rifiuta: si riprova col parser standard prima dei default
+                        pass
+                return json.loads(raw.decode("utf-8"))
             except Exception as e:
                 print(f"Errore caricamento profilo: {e}")
         
@@ -147,6 +273,9 @@ class EnhancedEmotionsAnalyzer:
         """Salva il profilo psicologico aggiornato"""
         try:
             self.profile_data["last_updated"] = datetime.datetime.now().isoformat()
+            if HAS_ORJSON:
+                self.profile_file.write_bytes(orjson.dumps(self.profile_data, option=orjson.OPT_INDENT_2))
+                return
             with open(self.profile_file, "w", encoding="utf-8") as f:
                 json.dump(self.profile_data, f, indent=2, ensure_ascii=False)
         except Exception as e:
@@ -253,6 +382,17 @@ class EnhancedEmotionsAnalyzer:
             {"role": "user", "content": prompt}
         ]
 
+        try:
+            litellm = _get_litellm()
+        except ImportError as e:
+            # Installato ma non importabile (es. dipendenze rotte): stesso esito di LiteLLM assente
+            print(f"[WARNING] Import LiteLLM fallito: {e}")
+            return {
+                **self._get_empty_analysis(),
+                "error": True,
+                "message": "LiteLLM not available" if language == "en" else "LiteLLM non disponibile"
+            }
+
         try:
             # Use LiteLLM for API call (synchronous)
             response = litellm.completion(
@@ -429,11 +569,8 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
         """Valida e normalizza i punteggi emotivi"""
         validated = {}
         for emotion in self.emotions_list:
-            score = emotions_dict.get(emotion, 0.0)
-            if isinstance(score, (int, float)):
-                validated[emotion] = max(0.0, min(1.0, float(score)))
-            else:
-                validated[emotion] = 0.0
+            score = _as_float(emotions_dict.get(emotion, 0.0), 0.0)
+            validated[emotion] = max(0.0, min(1.0, score))
         return validated
 
     def _update_psychological_profile(self, profile_updates: Dict):
@@ -585,10 +722,10 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
         print("🔍 Analizzando file del diario per costruire il profilo psicologico...")
         
         # Trova tutti i file di diario
-        journal_files = sorted([
-            f for f in self.journal_dir.glob("*.txt") 
-            if f.is_file() and f.stem.count('-') == 2  # Pattern YYYY-MM-DD
-        ], key=lambda x: x.stem)
+        journal_files = sorted(
+            Path(entry.path) for entry in self._scan_journal_files()
+            if entry.name[:-4].count('-') == 2  # Pattern YYYY-MM-DD
+        )
         
         if not journal_files:
             print("[WARNING] Nessun file di diario trovato")
@@ -615,18 +752,14 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
         """Analizza le emozioni dai file di diario (metodo legacy per retrocompatibilità)"""
         emotions_by_date = defaultdict(lambda: {emotion: 0.0 for emotion in self.emotions_list})
         
-        all_journal_files = [
-            f for f in self.journal_dir.glob("*.txt") 
-            if f.name != "settings.json" and f.is_file()
-        ]
-        
+        journal_entries = self._scan_journal_files()
+
         try:
-            sorted_files = sorted(all_journal_files, key=lambda x: x.stat().st_mtime, reverse=True)
+            journal_entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
         except OSError as e:
             print(f"Errore accesso file: {e}")
-            sorted_files = all_journal_files
 
-        files_to_analyze = sorted_files[:num_recent_files]
+        files_to_analyze = [Path(entry.path) for entry in journal_entries[:num_recent_files]]
 
         for file_path in files_to_analyze:
             date_str = file_path.stem
@@ -785,21 +918,9 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
         # Mappa le emozioni dall'inglese all'italiano per compatibilità
         emotional_profile_eng = self.profile_data.get("emotional_profile", {})
         emotional_profile_ita = {}
-        
-        # Mappatura inglese -> italiano
-        emotion_mapping = {
-            'happiness': 'felice',
-            'sadness': 'triste',
-            'anger': 'arrabbiato',
-            'anxiety': 'ansioso',
-            'serenity': 'sereno',
-            'stress': 'stressato',
-            'gratitude': 'grato',
-            'motivation': 'motivato'
-        }
-        
+
         # Converti le chiavi da inglese a italiano
-        for eng_key, ita_key in emotion_mapping.items():
+        for eng_key, ita_key in self.EMOTION_KEY_MAPPING.items():
             if eng_key in emotional_profile_eng:
                 emotional_profile_ita[ita_key] = emotional_profile_eng[eng_key]
             else:
@@ -822,27 +943,22 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
         self.profile_data = self.load_profile()
         
         # Se non ci sono dati analizzati, prova ad analizzare i file esistenti
+        # (solo se il diario è cambiato dall'ultimo tentativo)
         if self.profile_data.get("total_entries_analyzed", 0) == 0:
-            # Analizza i file di diario esistenti
-            self.analyze_and_update_psychological_profile()
-            self.profile_data = self.load_profile()
+            journal_mtime = self._get_journal_mtime()
+            if self._analysis_attempted_mtime != journal_mtime:
+                # Analizza i file di diario esistenti
+                self.analyze_and_update_psychological_profile()
+                self._analysis_attempted_mtime = journal_mtime
+                self.profile_data = self.load_profile()
         
         # Calcola il profilo emotivo cumulativo
-        emotional_profile = defaultdict(float)
+        emotional_profile = {}
         cumulative_summary = self.profile_data.get("cumulative_emotional_summary", {})
         
         # Mappa le emozioni dall'inglese all'italiano
-        emotion_mapping = {
-            'happiness': 'felice',
-            'sadness': 'triste', 
-            'anger': 'arrabbiato',
-            'anxiety': 'ansioso',
-            'serenity': 'sereno',
-            'stress': 'stressato',
-            'gratitude': 'grato',
-            'motivation': 'motivato'
-        }
-        
+        emotion_mapping = self.EMOTION_KEY_MAPPING
+
         for eng_key, ita_key in emotion_mapping.items():
             if eng_key in cumulative_summary:
                 emotional_profile[ita_key] = cumulative_summary[eng_key]
@@ -877,12 +993,9 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
                 if isinstance(value, dict):
                     # Se è un dict, prendi il valore score o un default
                     personality_traits[trait] = value.get('score', 0.5)
-                elif isinstance(value, (int, float)):
-                    # Se è già un numero, usalo
-                    personality_traits[trait] = float(value)
                 else:
-                    # Default a 0.5 se non riconosciuto
-                    personality_traits[trait] = 0.5
+                    # Usa il numero se convertibile, altrimenti default a 0.5
+                    personality_traits[trait] = _as_float(value, 0.5)
         
         # Usa sempre i 5 tratti standard per la dashboard, mappando i dati esistenti
         standard_traits = {
@@ -894,16 +1007,7 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
         }
         
         # Mappa i dati esistenti ai tratti standard se possibile
-        trait_mapping = {
-            "introversion_tendency": "Estroversione",
-            "stress_response_style": "Stabilità Emotiva",
-            "openness": "Apertura",
-            "conscientiousness": "Coscienziosità",
-            "agreeableness": "Gradevolezza",
-            "extraversion": "Estroversione",
-            "neuroticism": "Stabilità Emotiva",
-            "resilience": "Stabilità Emotiva"
-        }
+        trait_mapping = self.TRAIT_MAPPING
         
         # Applica i valori esistenti ai tratti standard
         for old_trait, value in personality_traits.items():
@@ -922,34 +1026,24 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
                 print(f"[DEBUG] Caricando tratti salvati: {saved_traits}")
                 for trait_key, trait_value in saved_traits.items():
                     if trait_key in trait_mapping:
-                        mapped_trait = trait_mapping[trait_key]
-                        if isinstance(trait_value, (int, float)):
-                            standard_traits[mapped_trait] = float(trait_value)
-                            print(f"[OK] Mappato {trait_key} -> {mapped_trait}: {trait_value}")
-                        elif isinstance(trait_value, dict):
-                            value = trait_value.get('value', trait_value.get('score', 0.5))
-                            # Assicurati che il valore sia numerico
-                            if isinstance(value, (int, float)):
-                                standard_traits[mapped_trait] = float(value)
-                                print(f"[OK] Mappato {trait_key} -> {mapped_trait}: {value}")
-                            else:
-                                # Se è una stringa o altro, usa il default
-                                standard_traits[mapped_trait] = 0.5
-                                print(f"[WARNING] Valore non numerico per {trait_key}, usando default 0.5")
+                        target_trait = trait_mapping[trait_key]
+                        label = f"Mappato {trait_key} -> {target_trait}"
                     elif trait_key in standard_traits:
-                        if isinstance(trait_value, (int, float)):
-                            standard_traits[trait_key] = float(trait_value)
-                            print(f"[OK] Usato direttamente {trait_key}: {trait_value}")
-                        elif isinstance(trait_value, dict):
-                            value = trait_value.get('value', trait_value.get('score', 0.5))
-                            # Assicurati che il valore sia numerico
-                            if isinstance(value, (int, float)):
-                                standard_traits[trait_key] = float(value)
-                                print(f"[OK] Usato direttamente {trait_key}: {value}")
-                            else:
-                                # Se è una stringa o altro, usa il default
-                                standard_traits[trait_key] = 0.5
-                                print(f"[WARNING] Valore non numerico per {trait_key}, usando default 0.5")
+                        target_trait = trait_key
+                        label = f"Usato direttamente {trait_key}"
+                    else:
+                        continue
+
+                    if isinstance(trait_value, dict):
+                        trait_value = trait_value.get('value', trait_value.get('score', 0.5))
+                    value = _as_float(trait_value, None)
+                    if value is not None:
+                        standard_traits[target_trait] = value
+                        print(f"[OK] {label}: {trait_value}")
+                    else:
+                        # Se è una stringa o altro, usa il default
+                        standard_traits[target_trait] = 0.5
+                        print(f"[WARNING] Valore non numerico per {trait_key}, usando default 0.5")
                 print(f"[INFO] Tratti finali: {standard_traits}")
             else:
                 print(f"[WARNING] Nessun tratto salvato trovato nel profilo")
@@ -959,112 +1053,94 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
         personality_traits = standard_traits
         
         # Prepara i fattori di stress
-        stress_factors = []
         stress_data = self.profile_data.get("stress_factors", [])
         
-        # Se stress_factors è una lista di stringhe o dict
-        for i, factor in enumerate(stress_data[:5]):
-            if isinstance(factor, dict):
-                # Prova diverse chiavi possibili
-                name = factor.get("factor") or factor.get("name") or factor.get("description", f"Fattore {i+1}")
-                value = factor.get("impact") or factor.get("value") or factor.get("score", 0.5)
-                stress_factors.append({
-                    "name": str(name),
-                    "value": float(value) if isinstance(value, (int, float)) else 0.5
-                })
-            elif isinstance(factor, str):
-                stress_factors.append({
-                    "name": factor,
-                    "value": 0.5
-                })
-            else:
-                stress_factors.append({
-                    "name": f"Fattore {i+1}",
-                    "value": 0.5
-                })
-        
-        # Se non ci sono fattori di stress, usa valori di default
-        if not stress_factors:
-            stress_factors = [
-                {"name": "Lavoro", "value": 0.3},
-                {"name": "Relazioni", "value": 0.2},
-                {"name": "Salute", "value": 0.1},
-                {"name": "Finanze", "value": 0.2},
-                {"name": "Tempo", "value": 0.4}
-            ]
+        # Se non ci sono dati, usa direttamente i valori di default
+        if not stress_data:
+            stress_factors = [dict(item) for item in self.DEFAULT_STRESS_FACTORS]
+        else:
+            stress_factors = []
+            # Se stress_factors è una lista di stringhe o dict
+            for i, factor in enumerate(stress_data[:5]):
+                if isinstance(factor, dict):
+                    # Prova diverse chiavi possibili
+                    name = _first_present(factor, ("factor", "name", "description"), f"Fattore {i+1}")
+                    value = _first_number(factor, ("impact", "value", "score"), 0.5)
+                    stress_factors.append({
+                        "name": str(name),
+                        "value": _as_float(value, 0.5)
+                    })
+                elif isinstance(factor, str):
+                    stress_factors.append({
+                        "name": factor,
+                        "value": 0.5
+                    })
+                else:
+                    stress_factors.append({
+                        "name": f"Fattore {i+1}",
+                        "value": 0.5
+                    })
         
         # Prepara le strategie efficaci
-        effective_strategies = []
         strategies_data = self.profile_data.get("effective_strategies", [])
         
-        for i, strategy in enumerate(strategies_data[:5]):
-            if isinstance(strategy, dict):
-                # Prova diverse chiavi possibili
-                name = strategy.get("strategy") or strategy.get("name") or strategy.get("description", f"Strategia {i+1}")
-                value = strategy.get("effectiveness") or strategy.get("value") or strategy.get("score", 0.7)
-                effective_strategies.append({
-                    "name": str(name),
-                    "value": float(value) if isinstance(value, (int, float)) else 0.7
-                })
-            elif isinstance(strategy, str):
-                effective_strategies.append({
-                    "name": strategy,
-                    "value": 0.7
-                })
-            else:
-                effective_strategies.append({
-                    "name": f"Strategia {i+1}",
-                    "value": 0.7
-                })
-        
-        # Se non ci sono strategie, usa valori di default
-        if not effective_strategies:
-            effective_strategies = [
-                {"name": "Meditazione", "value": 0.8},
-                {"name": "Esercizio fisico", "value": 0.7},
-                {"name": "Scrittura", "value": 0.9},
-                {"name": "Socializzare", "value": 0.6},
-                {"name": "Riposo", "value": 0.7}
-            ]
+        # Se non ci sono dati, usa direttamente i valori di default
+        if not strategies_data:
+            effective_strategies = [dict(item) for item in self.DEFAULT_EFFECTIVE_STRATEGIES]
+        else:
+            effective_strategies = []
+            for i, strategy in enumerate(strategies_data[:5]):
+                if isinstance(strategy, dict):
+                    # Prova diverse chiavi possibili
+                    name = _first_present(strategy, ("strategy", "name", "description"), f"Strategia {i+1}")
+                    value = _first_number(strategy, ("effectiveness", "value", "score"), 0.7)
+                    effective_strategies.append({
+                        "name": str(name),
+                        "value": _as_float(value, 0.7)
+                    })
+                elif isinstance(strategy, str):
+                    effective_strategies.append({
+                        "name": strategy,
+                        "value": 0.7
+                    })
+                else:
+                    effective_strategies.append({
+                        "name": f"Strategia {i+1}",
+                        "value": 0.7
+                    })
         
         # Prepara le relazioni chiave
-        key_relationships = []
         relationships_data = self.profile_data.get("relationship_dynamics", {})
         
-        for i, (person, data) in enumerate(list(relationships_data.items())[:5]):
-            if isinstance(data, dict):
-                # Calcola un punteggio di qualità basato sulle interazioni
-                interactions = data.get("interactions", [])
-                if interactions:
-                    # Prendi l'ultima interazione per la qualità
-                    last_interaction = interactions[-1]
-                    quality = last_interaction.get("emotional_tone", 0.5)
-                    if isinstance(quality, str):
-                        # Converti parole in numeri
-                        quality_map = {"positive": 0.8, "neutral": 0.5, "negative": 0.2}
-                        quality = quality_map.get(quality.lower(), 0.5)
-                else:
-                    quality = 0.5
+        # Se non ci sono dati, usa direttamente i valori di default
+        if not relationships_data:
+            key_relationships = [dict(item) for item in self.DEFAULT_KEY_RELATIONSHIPS]
+        else:
+            key_relationships = []
+            for i, (person, data) in enumerate(list(relationships_data.items())[:5]):
+                if isinstance(data, dict):
+                    # Calcola un punteggio di qualità basato sulle interazioni
+                    interactions = data.get("interactions", [])
+                    if interactions:
+                        # Prendi l'ultima interazione per la qualità
+                        last_interaction = interactions[-1]
+                        quality = last_interaction.get("emotional_tone", 0.5)
+                        if isinstance(quality, str):
+                            # Converti parole in numeri
+                            quality_map = {"positive": 0.8, "neutral": 0.5, "negative": 0.2}
+                            quality = quality_map.get(quality.lower(), 0.5)
+                    else:
+                        quality = 0.5
                 
-                key_relationships.append({
-                    "name": person,
-                    "value": float(quality) if isinstance(quality, (int, float)) else 0.5
-                })
-            else:
-                key_relationships.append({
-                    "name": str(person),
-                    "value": 0.5
-                })
-        
-        # Se non ci sono relazioni, usa valori di default
-        if not key_relationships:
-            key_relationships = [
-                {"name": "Famiglia", "value": 0.8},
-                {"name": "Amici", "value": 0.7},
-                {"name": "Colleghi", "value": 0.6},
-                {"name": "Partner", "value": 0.9},
-                {"name": "Conoscenti", "value": 0.5}
-            ]
+                    key_relationships.append({
+                        "name": person,
+                        "value": _as_float(quality, 0.5)
+                    })
+                else:
+                    key_relationships.append({
+                        "name": str(person),
+                        "value": 0.5
+                    })
         
         # Prepara l'insight principale
         main_insight = self.profile_data.get("main_insight", {})
@@ -1075,24 +1151,24 @@ Rispondi SOLO con questo JSON esatto (nessun testo prima o dopo):
                 # Trova l'emozione dominante
                 dominant_emotion = max(emotional_profile.items(), key=lambda x: x[1]) if emotional_profile else ("sereno", 0.2)
                 
-                insight_text = f"Dopo aver analizzato {total_entries} voci del diario, emerge che la tua emozione predominante è '{dominant_emotion[0]}' ({dominant_emotion[1]*100:.0f}%). "
+                insight_parts = [f"Dopo aver analizzato {total_entries} voci del diario, emerge che la tua emozione predominante è '{dominant_emotion[0]}' ({dominant_emotion[1]*100:.0f}%)."]
                 
                 # Aggiungi suggerimento basato sui fattori di stress
                 if stress_factors:
                     top_stress = max(stress_factors, key=lambda x: x['value'])
-                    insight_text += f"Il principale fattore di stress sembra essere '{top_stress['name']}'. "
+                    insight_parts.append(f"Il principale fattore di stress sembra essere '{top_stress['name']}'.")
                 
                 # Aggiungi strategia efficace
                 if effective_strategies:
                     top_strategy = max(effective_strategies, key=lambda x: x['value'])
-                    insight_text += f"La strategia più efficace per te è '{top_strategy['name']}'."
+                    insight_parts.append(f"La strategia più efficace per te è '{top_strategy['name']}'.")
                 
-                main_insight = {"text": insight_text}
+                main_insight = {"text": " ".join(insight_parts)}
             else:
                 main_insight = {"text": "Continua a scrivere nel diario per generare insights personalizzati basati sulle tue riflessioni."}
         
         return {
-            "emotional_profile": dict(emotional_profile),
+            "emotional_profile": emotional_profile,
             "personality_traits": personality_traits,
             "stress_factors": stress_factors,
             "effective_strategies": effective_strategies,
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Lettura dei file .txt del diario, condivisa da MemvidMemory e dagli script di conversione
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# Data nel nome file (es. 2025-05-21.txt)
+_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})')
+
+
+def list_journal_files(journal_dir: Path) -> List[Path]:
+    """
+    File .txt del diario (esclusi i nascosti) ordinati per nome, cioè per data.
+    os.scandir: nome e tipo arrivano già dalla lettura della directory.
+    """
+    journal_dir = Path(journal_dir)
+    if not journal_dir.is_dir():
+        return []
+    with os.scandir(journal_dir) as it:
+        entries = [
+            e for e in it
+            if e.name.endswith(".txt") and not e.name.startswith(".") and e.is_file()
+        ]
+    entries.sort(key=lambda e: e.name)
+    return [Path(e.path) for e in entries]
+
+
+def read_journal_text(file_path: Path) -> str:
+    """
+    Legge un file del diario come testo (strip incluso).
+    I file solo-ASCII vengono decodificati senza validazione UTF-8;
+    i fine riga Windows sono normalizzati come farebbe read_text.
+    """
+    raw = file_path.read_bytes()
+    text = raw.decode("ascii") if raw.isascii() else raw.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.strip()
+
+
+def parse_date_from_filename(filename: str) -> Tuple[str, int]:
+    """
+    Estrae data (YYYY-MM-DD) e timestamp locale dal nome del file (es. 2025-05-21.txt).
+    La data è già nel nome: nessun oggetto datetime per ogni file.
+    """
+    match = _DATE_RE.match(filename)
+    if not match:
+        now = time.time()
+        return time.strftime("%Y-%m-%d", time.localtime(now)), int(now)
+
+    year, month, day = map(int, match.groups())
+    timestamp = int(time.mktime((year, month, day, 0, 0, 0, 0, 0, -1)))
+    # mktime normalizza le date impossibili (es. 2025-02-30 -> 2025-03-02): vanno rifiutate
+    if time.localtime(timestamp)[:3] != (year, month, day):
+        raise ValueError(f"data non valida nel nome file: {filename}")
+    return match.group(0), timestamp
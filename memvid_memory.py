@@ -6,9 +6,21 @@ Drop-in replacement for UnifiedMemory using Memvid V2
 
 import os
 import re
+import json
+import heapq
+import bisect
+import hashlib
+import sqlite3
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from collections import Counter
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+
+from journal_files import list_journal_files, read_journal_text
 
 try:
     import memvid_sdk
@@ -17,6 +29,28 @@ except ImportError:
     HAS_MEMVID = False
     print("ATTENZIONE: memvid-sdk non installato. pip install memvid-sdk")
 
+# Il modello è addestrato Matryoshka: i primi 256 valori (su 768) bastano per il retrieval.
+# Valori supportati: 768, 512, 256, 128 (al cambio gli embeddings salvati vengono rigenerati)
+SUPPORTED_EMBEDDING_DIMS = (768, 512, 256, 128)
+DEFAULT_EMBEDDING_DIM = 256
+
+
+def _embedding_dim_from_env() -> int:
+    """Legge REMINOR_EMBEDDING_DIM; valori non numerici o non supportati -> default (con avviso)"""
+    raw = os.getenv("REMINOR_EMBEDDING_DIM")
+    if raw is None:
+        return DEFAULT_EMBEDDING_DIM
+    try:
+        dim = int(raw)
+    except ValueError:
+        dim = None
+    if dim not in SUPPORTED_EMBEDDING_DIMS:
+        print(f"ATTENZIONE: REMINOR_EMBEDDING_DIM={raw!r} non supportato "
+              f"(valori ammessi: {SUPPORTED_EMBEDDING_DIMS}), uso {DEFAULT_EMBEDDING_DIM}")
+        return DEFAULT_EMBEDDING_DIM
+    return dim
+
+
 # Modello embedding italiano ottimizzato
 try:
     from sentence_transformers import SentenceTransformer
@@ -24,11 +58,258 @@ try:
     HAS_EMBEDDINGS = True
     # Ungated mirror of google/embeddinggemma-300m (identical weights, no HF token needed)
     EMBEDDING_MODEL = "unsloth/embeddinggemma-300m"
+    EMBEDDING_DIM = _embedding_dim_from_env()
 except ImportError:
     HAS_EMBEDDINGS = False
     EMBEDDING_MODEL = None
+    EMBEDDING_DIM = None
     print("ATTENZIONE: sentence-transformers non installato per ricerca semantica")
 
+# torch (dipendenza di sentence-transformers) per limitare i thread e disattivare l'autograd
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+# Token indicizzati per la ricerca diretta (parole di almeno 3 lettere, minuscole)
+_TOKEN_RE = re.compile(r'\b[a-zàèéìòù]{3,}\b')
+# Parole della query, data nel nome file (YYYY-MM-DD) e data nei titoli dei risultati
+_WORD_RE = re.compile(r'\b[a-zA-ZàèéìòùÀÈÉÌÒÙ]+\b')
+_FILE_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+_HIT_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Stopwords italiane da ignorare nella ricerca diretta
+_STOPWORDS = frozenset({
+    'il', 'lo', 'la', 'i', 'gli', 'le', 'un', 'uno', 'una',
+    'di', 'a', 'da', 'in', 'con', 'su', 'per', 'tra', 'fra',
+    'che', 'chi', 'cosa', 'come', 'dove', 'quando', 'perché',
+    'e', 'o', 'ma', 'se', 'non', 'più', 'anche', 'solo',
+    'mi', 'ti', 'ci', 'vi', 'si', 'me', 'te', 'lui', 'lei',
+    'noi', 'voi', 'loro', 'mio', 'tuo', 'suo', 'nostro',
+    'questo', 'quello', 'quale', 'quanto', 'tutto', 'ogni',
+    'conosci', 'sai', 'dimmi', 'parlami', 'raccontami', 'dici'
+})
+
+# Mappa mesi italiani a numeri
+_MONTHS = {
+    'gennaio': '01', 'febbraio': '02', 'marzo': '03', 'aprile': '04',
+    'maggio': '05', 'giugno': '06', 'luglio': '07', 'agosto': '08',
+    'settembre': '09', 'ottobre': '10', 'novembre': '11', 'dicembre': '12'
+}
+
+# orjson (opzionale) per codificare/decodificare i campi JSON delle emozioni
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _decode_json_field(value: str):
+    """Decodifica un campo JSON che potrebbe essere doppiamente codificato (Memvid aggiunge virgolette extra)"""
+    if not value:
+        return None
+    try:
+        decoded = _json_loads(value)
+        if isinstance(decoded, str):
+            decoded = _json_loads(decoded)
+        return decoded
+    except:
+        try:
+            clean = value.strip('"').replace('\\"', '"')
+            return _json_loads(clean)
+        except:
+            return None
+
+
+@lru_cache(maxsize=512)
+def _parse_query(query: str) -> Tuple[Tuple[str, ...], Optional[str]]:
+    """
+    Estrae le parole chiave significative e l'eventuale filtro per mese da una query.
+    In cache: la stessa query ricorre spesso (retry del chatbot, UI e chatbot insieme).
+    """
+    query_lower = query.lower()
+    words = _WORD_RE.findall(query_lower)
+    keywords = [w for w in words if w not in _STOPWORDS and len(w) >= 3]
+
+    # Controlla se c'è un mese nella query
+    month_filter = None
+    for mese, num in _MONTHS.items():
+        if mese in query_lower:
+            month_filter = f"-{num}-"
+            keywords.append(mese)  # Aggiungi anche il mese come keyword
+            break
+
+    return tuple(keywords), month_filter
+
+
+def _shingles(text: str) -> set:
+    """Trigrammi di parole del testo (le singole parole se il testo è più corto)"""
+    words = text.lower().split()
+    if len(words) < 3:
+        return set(words)
+    return set(zip(words, words[1:], words[2:]))
+
+
+def _is_near_duplicate(old_text: str, new_text: str) -> bool:
+    """True se i due testi sono quasi identici (similarità di Jaccard sui trigrammi di parole)"""
+    if old_text == new_text:
+        return True
+    old_shingles = _shingles(old_text)
+    new_shingles = _shingles(new_text)
+    union = len(old_shingles | new_shingles)
+    if not union:
+        return False
+    return len(old_shingles & new_shingles) / union >= NEAR_DUPLICATE_THRESHOLD
+
+
+def _synchronized(method):
+    """
+    Esegue il metodo tenendo il lock dell'istanza: le ricerche girano in un thread del backend
+    mentre add_entry/save_emotions modificano indici, vector store e file Memvid.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _cache_get(cache: dict, key, compute):
+    """Lookup in una cache LRU su dict (ordine di inserimento), con al massimo QUERY_CACHE_SIZE voci"""
+    if key in cache:
+        value = cache.pop(key)
+    else:
+        value = compute()
+        if len(cache) >= QUERY_CACHE_SIZE:
+            del cache[next(iter(cache))]
+    cache[key] = value
+    return value
+
+
+@lru_cache(maxsize=1)
+def _popcount_table():
+    """Numero di bit a 1 per ogni valore di un byte (per la distanza di Hamming)"""
+    return np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+# FAISS (opzionale) per ricerca approssimata HNSW su diari molto grandi
+try:
+    import faiss
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+# Dimensione batch per l'encoding di più documenti in una sola chiamata
+EMBEDDING_BATCH_SIZE = 32
+
+# Thread usati per leggere in parallelo i file .txt durante l'indicizzazione
+FILE_READ_WORKERS = 8
+
+# Numero di query recenti di cui tenere in cache l'embedding (retry/rigenerazioni nel chatbot)
+QUERY_CACHE_SIZE = 256
+
+# Sotto questa soglia la scansione lineare (una matmul) è più veloce e sempre esatta
+FAISS_MIN_ENTRIES = 2000
+
+# Oltre questa soglia l'indice FAISS passa da HNSW a IVF-PQ (sublineare e molto più compatto)
+FAISS_IVFPQ_MIN_ENTRIES = 20000
+FAISS_IVF_NPROBE = 16
+
+# Senza FAISS, oltre FAISS_MIN_ENTRIES: candidati (k * fattore) preselezionati con i codici binari
+BINARY_RERANK_FACTOR = 10
+
+# Similarità (Jaccard sui trigrammi di parole) oltre la quale una modifica riusa l'embedding precedente
+NEAR_DUPLICATE_THRESHOLD = 0.95
+
+# Query più corte (es. una sola lettera) non vengono cercate: troverebbero quasi ogni entry
+MIN_QUERY_LENGTH = 2
+
+# Backend di inferenza per il modello di embedding: "torch" (default), "onnx" o "openvino".
+# onnx/openvino sono più veloci su CPU ma richiedono pacchetti extra non inclusi in requirements.txt
+# (pip install "optimum[onnxruntime]" oppure "optimum[openvino]")
+EMBEDDING_BACKEND = os.getenv("REMINOR_EMBEDDING_BACKEND", "torch").lower()
+
+# Cartella dove salvare il modello esportato (l'export avviene solo al primo avvio)
+EMBEDDING_EXPORT_DIR = Path.home() / ".cache" / "reminor"
+
+
+# Modelli di embedding già caricati, condivisi da tutte le istanze (uno per configurazione)
+_embedding_models: Dict[Tuple[str, Optional[int]], Any] = {}
+_embedding_models_lock = threading.Lock()
+
+
+def _load_exported_model(backend: str):
+    """
+    Carica il modello con backend ONNX/OpenVINO (molto più veloce su CPU).
+    Al primo avvio esporta il modello in ~/.cache/reminor/<backend>/ e poi riusa l'export.
+    Ritorna None se il backend non è disponibile (si ripiega su PyTorch).
+    """
+    export_dir = EMBEDDING_EXPORT_DIR / backend / EMBEDDING_MODEL.replace("/", "--")
+    try:
+        if export_dir.exists():
+            return SentenceTransformer(str(export_dir), backend=backend, truncate_dim=EMBEDDING_DIM)
+
+        model = SentenceTransformer(EMBEDDING_MODEL, backend=backend, truncate_dim=EMBEDDING_DIM)
+        try:
+            export_dir.parent.mkdir(parents=True, exist_ok=True)
+            model.save(str(export_dir))
+        except Exception as e:
+            print(f"  Impossibile salvare il modello {backend}: {e}")
+        return model
+    except Exception as e:
+        print(f"  Backend {backend} non disponibile ({e}), uso PyTorch")
+        return None
+
+
+def load_embedding_model():
+    """
+    Restituisce il modello di embedding, caricandolo una sola volta per processo.
+    Il backend multi-utente lo chiama all'avvio in un thread separato, così la prima
+    richiesta di un utente non paga il caricamento del modello. None se non disponibile.
+    """
+    if not HAS_EMBEDDINGS:
+        return None
+
+    key = (EMBEDDING_BACKEND, EMBEDDING_DIM)
+    with _embedding_models_lock:
+        model = _embedding_models.get(key)
+        if model is not None:
+            return model
+
+        if HAS_TORCH:
+            # I default di torch sovra-allocano i thread sulle macchine multi-core
+            torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                # Già impostato (si può fare una sola volta per processo)
+                pass
+
+        print(f"Caricamento modello embeddings: {EMBEDDING_MODEL}...")
+        if EMBEDDING_BACKEND != "torch":
+            model = _load_exported_model(EMBEDDING_BACKEND)
+
+        if model is None:
+            try:
+                model = SentenceTransformer(EMBEDDING_MODEL, truncate_dim=EMBEDDING_DIM)
+            except Exception as e:
+                print(f"  Errore caricamento modello: {e}")
+                return None
+
+        print(f"  Modello caricato: {model.get_sentence_embedding_dimension()}D")
+        _embedding_models[key] = model
+        return model
+
 
 class MemvidMemory:
     """
@@ -46,27 +327,61 @@ class MemvidMemory:
             memvid_file: Path al file .mv2 (default: journal_dir/../reminor_memory.mv2)
         """
         self.journal_dir = Path(journal_dir)
+        # Lock rientrante: protegge tutto lo stato condiviso tra letture e scritture concorrenti
+        self._lock = threading.RLock()
 
         if memvid_file:
             self.memvid_path = Path(memvid_file)
         else:
             self.memvid_path = self.journal_dir.parent / "reminor_memory.mv2"
 
-        # Path per embeddings (stesso nome, estensione .npz)
+        # Vector store embeddings: matrice float32 grezza (memory-mapped) + date in JSON Lines
+        self.vectors_path = self.memvid_path.with_suffix('.vec')
+        self.vector_ids_path = self.memvid_path.with_suffix('.ids.jsonl')
+        # Vecchio formato .npz (migrato automaticamente al primo avvio)
         self.embeddings_path = self.memvid_path.with_suffix('.npz')
+        # Indice HNSW opzionale (FAISS), costruito su richiesta
+        self.faiss_index_path = self.memvid_path.with_suffix('.faiss')
+        # Cache persistente degli embeddings per contenuto (sopravvive ai rebuild)
+        self.embedding_cache_path = self.memvid_path.with_suffix('.embcache.sqlite')
+        self._faiss_index = None
+        # L'indice in memoria contiene vettori superati (modifiche a date esistenti): resta in uso
+        # finché un thread in background non ne ha costruito uno nuovo
+        self._faiss_stale = False
+        self._faiss_generation = 0  # incrementata quando cambiano righe esistenti (non per le aggiunte)
+        self._faiss_building = False
 
         self.mem = None
         self.entries: Dict[str, str] = {}
+        # Cache per la ricerca diretta: testo minuscolo per data e indice invertito
+        self._entries_lower: Dict[str, str] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}  # token -> {date: frequenza}
+        # Date delle entries in ordine crescente (query per intervallo via bisect)
+        self._sorted_dates: List[str] = []
 
         # Cache emozioni in memoria (per evitare problemi di lettura dopo seal)
         self._emotions_cache: Dict[str, Dict[str, Any]] = {}
+        # True dopo aver caricato in cache tutte le emozioni salvate in Memvid
+        self._emotions_cache_built = False
 
         # File JSON per persistere le emozioni (più affidabile di memvid per questo uso)
         self.emotions_file = self.memvid_path.with_name("emotions.json")
 
         # Embeddings
         self.embedding_model = None
+        # Cache LRU dell'istanza (dict semplici: un lru_cache su un metodo legato crea un ciclo con self)
+        self._query_cache: Dict[str, bytes] = {}  # query -> embedding normalizzato
+        # Risultati BM25 per (query, k); svuotata ad ogni scrittura su Memvid
+        self._hits_cache: Dict[Tuple[str, int], tuple] = {}
         self.embeddings: Dict[str, Any] = {}  # date -> embedding vector
+        # Testo da cui è stato calcolato ciascun embedding in questa sessione (per le modifiche minime)
+        self._emb_source: Dict[str, str] = {}
+        # Matrice [N, D] float32 normalizzata L2 (righe allineate a _emb_dates)
+        self._emb_matrix = None
+        self._emb_dates: List[str] = []
+        self._emb_rows: Dict[str, int] = {}  # date -> indice riga in _emb_matrix
+        self._emb_store = None  # np.memmap sul file .vec (capacità >= righe usate)
+        self._emb_bits = None  # codici binari (segno) di _emb_matrix, calcolati su richiesta
 
         if not HAS_MEMVID:
             print("ATTENZIONE: Memvid non disponibile")
@@ -96,59 +411,419 @@ class MemvidMemory:
         """Carica le emozioni salvate dal file JSON"""
         if self.emotions_file.exists():
             try:
-                import json
                 with open(self.emotions_file, 'r', encoding='utf-8') as f:
-                    self._emotions_cache = json.load(f)
+                    self._emotions_cache = _json_loads(f.read())
                 print(f"  Caricate {len(self._emotions_cache)} emozioni da JSON")
             except Exception as e:
                 print(f"Errore caricamento emozioni JSON: {e}")
                 self._emotions_cache = {}
 
     def _save_emotions_to_json(self):
-        """Salva le emozioni nel file JSON"""
+        """Salva le emozioni nel file JSON (compatto, scrittura atomica via file temporaneo)"""
+        tmp_path = self.emotions_file.with_name(self.emotions_file.name + ".tmp")
         try:
-            import json
-            with open(self.emotions_file, 'w', encoding='utf-8') as f:
-                json.dump(self._emotions_cache, f, ensure_ascii=False, indent=2)
+            # Il file è riscritto a ogni analisi e non è pensato per la modifica a mano:
+            # niente indentazione, e os.replace evita di lasciarlo troncato se il processo muore
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(_json_dumps(self._emotions_cache))
+            os.replace(tmp_path, self.emotions_file)
         except Exception as e:
             print(f"Errore salvataggio emozioni JSON: {e}")
 
     def _initialize_embeddings(self):
-        """Inizializza il modello di embedding per ricerca semantica"""
+        """Inizializza il modello di embedding per ricerca semantica (condiviso tra le istanze)"""
         if not HAS_EMBEDDINGS:
             return
+        self.embedding_model = load_embedding_model()
 
+    def _encode_documents(self, texts: List[str]):
+        """
+        Embeddings normalizzati di più documenti, a batch.
+        I vettori sono in cache su disco per (modello, sha256 del testo): dopo un rebuild
+        o una migrazione vengono ricalcolati solo i testi nuovi o modificati.
+        """
+        model_key = f"{EMBEDDING_MODEL}:{self._model_dim()}"
+        hashes = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        cached = {}
         try:
-            print(f"Caricamento modello embeddings: {EMBEDDING_MODEL}...")
-            self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
-            print(f"  Modello caricato: {self.embedding_model.get_sentence_embedding_dimension()}D")
-        except Exception as e:
-            print(f"  Errore caricamento modello: {e}")
-            self.embedding_model = None
+            with closing(sqlite3.connect(self.embedding_cache_path)) as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings "
+                    "(model TEXT, hash TEXT, vec BLOB, PRIMARY KEY (model, hash))"
+                )
+                for text_hash in set(hashes):
+                    row = conn.execute(
+                        "SELECT vec FROM embeddings WHERE model = ? AND hash = ?",
+                        (model_key, text_hash)
+                    ).fetchone()
+                    if row:
+                        cached[text_hash] = np.frombuffer(row[0], dtype=np.float32)
+        except sqlite3.Error as e:
+            print(f"  Cache embeddings non disponibile: {e}")
+
+        missing = [i for i, text_hash in enumerate(hashes) if text_hash not in cached]
+        if missing:
+            vectors = self._encode(
+                [texts[i] for i in missing],
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            new_vectors = {}
+            for i, vector in zip(missing, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                cached[hashes[i]] = vector
+                new_vectors[hashes[i]] = vector
+            self._write_embedding_cache(model_key, new_vectors)
+
+        return np.stack([cached[text_hash] for text_hash in hashes])
+
+    def _write_embedding_cache(self, model_key: str, vectors: Dict[str, Any]):
+        """Salva nella cache su disco i vettori (sha256 del testo -> vettore)"""
+        try:
+            with closing(sqlite3.connect(self.embedding_cache_path)) as conn:
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS embeddings "
+                        "(model TEXT, hash TEXT, vec BLOB, PRIMARY KEY (model, hash))"
+                    )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, hash, vec) VALUES (?, ?, ?)",
+                        [(model_key, text_hash, vector.tobytes()) for text_hash, vector in vectors.items()]
+                    )
+        except sqlite3.Error as e:
+            print(f"  Errore salvataggio cache embeddings: {e}")
+
+    def _model_dim(self) -> Optional[int]:
+        """Dimensione dei vettori prodotti dal modello (None se il modello non è caricato)"""
+        if not self.embedding_model:
+            return None
+        return self.embedding_model.get_sentence_embedding_dimension()
+
+    def _encode(self, texts, **kwargs):
+        """Encoding senza autograd: il grafo dei gradienti non serve mai in inferenza"""
+        if HAS_TORCH:
+            with torch.inference_mode():
+                return self.embedding_model.encode(texts, **kwargs)
+        return self.embedding_model.encode(texts, **kwargs)
 
     def _load_embeddings(self):
-        """Carica embeddings salvati da file .npz"""
+        """Carica embeddings dal vector store su disco (memory-mapped) o dal vecchio file .npz"""
+        if self.vector_ids_path.exists() and self.vectors_path.exists():
+            try:
+                self._open_vector_store()
+            except Exception as e:
+                print(f"Errore caricamento embeddings: {e}")
+            return
+
         if not self.embeddings_path.exists():
             return
 
+        # Migrazione dal vecchio formato .npz
         try:
             data = np.load(self.embeddings_path, allow_pickle=True)
             if 'dates' in data and 'vectors' in data:
                 dates = data['dates']
                 vectors = data['vectors']
-                self.embeddings = {d: v for d, v in zip(dates, vectors)}
+            else:
+                return
+            model_dim = self._model_dim()
+            if model_dim and (vectors.ndim != 2 or vectors.shape[1] != model_dim):
+                # Vecchi vettori a 768D: si rigenerano troncati
+                print("  Dimensione embeddings cambiata, rigenerazione...")
+                self.embeddings_path.unlink()
+                return
+            self.embeddings = {str(d): v for d, v in zip(dates, vectors)}
+            self._rebuild_emb_matrix()
+            self._save_embeddings()
+            self.embeddings_path.unlink()
         except Exception as e:
             print(f"Errore caricamento embeddings: {e}")
 
-    def _save_embeddings(self):
-        """Salva embeddings su file .npz"""
+    def _open_vector_store(self):
+        """Apre il vector store: header+date da .ids.jsonl, vettori float32 in memory-map da .vec"""
+        with open(self.vector_ids_path, "r", encoding="utf-8") as f:
+            header = _json_loads(f.readline())
+            dates = [_json_loads(line)["date"] for line in f if line.strip()]
+
+        dim = int(header["dim"])
+        model_dim = self._model_dim()
+        if model_dim and dim != model_dim:
+            # Salvati con un'altra dimensione (es. 768D prima del troncamento): si rigenerano
+            print(f"  Dimensione embeddings cambiata ({dim}D -> {model_dim}D), rigenerazione...")
+            self._delete_vector_store()
+            return
+        capacity = self.vectors_path.stat().st_size // (dim * 4)
+        # Righe scritte senza la corrispondente riga id (es. crash) vengono ignorate
+        self._emb_dates = dates[:capacity]
+        self._emb_rows = {date: i for i, date in enumerate(self._emb_dates)}
+        self._map_vector_store(dim)
+
+    def _map_vector_store(self, dim: int):
+        """Mappa il file .vec in memoria e allinea matrice e dict embeddings alle date note"""
+        self._emb_bits = None
+        capacity = self.vectors_path.stat().st_size // (dim * 4)
+        if capacity == 0:
+            self._emb_store = None
+            self._emb_matrix = None
+            self.embeddings = {}
+            return
+
+        self._emb_store = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(capacity, dim))
+        self._emb_matrix = self._emb_store[:len(self._emb_dates)] if self._emb_dates else None
+        self.embeddings = {date: self._emb_store[i] for i, date in enumerate(self._emb_dates)}
+
+    def _release_vector_store(self):
+        """Copia gli embeddings in RAM e chiude la memory-map (necessario prima di riscrivere i file)"""
+        if self._emb_store is None:
+            return
+        if self._emb_matrix is not None:
+            self._emb_matrix = np.array(self._emb_matrix, dtype=np.float32)
+            self.embeddings = {date: self._emb_matrix[i] for i, date in enumerate(self._emb_dates)}
+        self._emb_store = None
+
+    def _delete_vector_store(self):
+        """Elimina i file degli embeddings (vector store e vecchio .npz)"""
+        self._release_vector_store()
+        for path in (self.vectors_path, self.vector_ids_path, self.embeddings_path):
+            if path.exists():
+                path.unlink()
+
+    @staticmethod
+    def _normalize_vector(vector) -> Any:
+        """Converte un vettore in float32 normalizzato L2"""
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _rebuild_emb_matrix(self):
+        """Ricostruisce la matrice normalizzata degli embeddings usata dalla ricerca semantica"""
         if not self.embeddings:
+            self._emb_matrix = None
+            self._emb_dates = []
+            self._emb_rows = {}
+            return
+
+        self._emb_dates = list(self.embeddings.keys())
+        self._emb_rows = {date: i for i, date in enumerate(self._emb_dates)}
+        matrix = np.array(list(self.embeddings.values()), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._emb_matrix = np.ascontiguousarray(matrix / norms)
+        self._emb_bits = None
+
+    def _update_emb_matrix(self, date: str):
+        """Aggiorna (o aggiunge) la riga di una singola data, scrivendo solo quella riga su disco"""
+        vector = self._normalize_vector(self.embeddings[date])
+        row = self._emb_rows.get(date)
+        self._emb_bits = None
+
+        if self._emb_store is None:
+            # Nessun vector store su disco: riscrittura completa
+            self._rebuild_emb_matrix()
+            self._invalidate_faiss_index()
+            self._save_embeddings()
+            return
+
+        try:
+            if row is not None:
+                self._emb_store[row] = vector
+                self._emb_store.flush()
+                self.embeddings[date] = self._emb_store[row]
+                # HNSW non supporta l'aggiornamento di un vettore: si continua a usare l'indice attuale
+                # (solo lo score di questa data è un po' datato) e lo si ricostruisce in background
+                self._mark_faiss_stale()
+                return
+
+            row = len(self._emb_dates)
+            dim = self._emb_store.shape[1]
+            if row >= self._emb_store.shape[0]:
+                # Cresci la capacità del file a blocchi (2x) per evitare resize ad ogni aggiunta
+                self._release_vector_store()
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(max(2 * row, 16) * dim * 4)
+                self._map_vector_store(dim)
+
+            self._emb_store[row] = vector
+            self._emb_store.flush()
+            with open(self.vector_ids_path, "a", encoding="utf-8") as f:
+                f.write(_json_dumps({"date": date}) + "\n")
+
+            self._emb_dates.append(date)
+            self._emb_rows[date] = row
+            self._emb_matrix = self._emb_store[:row + 1]
+            self.embeddings[date] = self._emb_store[row]
+        except Exception as e:
+            print(f"Errore aggiornamento vector store: {e}")
+            return
+
+        if self._faiss_index is not None:
+            try:
+                self._faiss_index.add(vector.reshape(1, -1))
+                if not self._faiss_stale:
+                    faiss.write_index(self._faiss_index, str(self.faiss_index_path))
+            except Exception as e:
+                print(f"Errore aggiornamento indice FAISS: {e}")
+                self._invalidate_faiss_index()
+
+    def _binary_candidates(self, query_embedding, count: int):
+        """
+        Righe candidate più vicine alla query secondo i codici binari (1 bit per dimensione: il segno).
+        La distanza di Hamming su 32 byte per vettore costa molto meno del prodotto scalare float32.
+        """
+        if self._emb_bits is None or len(self._emb_bits) != len(self._emb_dates):
+            self._emb_bits = np.packbits(self._emb_matrix > 0, axis=1)
+
+        query_bits = np.packbits(query_embedding > 0)
+        xor = self._emb_bits ^ query_bits
+        if hasattr(np, "bitwise_count"):
+            # NumPy >= 2.0: popcount nativo (istruzione POPCNT) sui byte
+            distances = np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+        else:
+            # Tabella popcount a 256 voci: niente espansione 8x dei bit come con unpackbits
+            distances = _popcount_table()[xor].sum(axis=1, dtype=np.int32)
+        if count >= len(distances):
+            return np.arange(len(distances))
+        return np.argpartition(distances, count - 1)[:count]
+
+    def _delete_faiss_file(self):
+        """Elimina l'indice FAISS salvato su disco"""
+        if self.faiss_index_path.exists():
+            try:
+                self.faiss_index_path.unlink()
+            except OSError:
+                pass
+
+    def _invalidate_faiss_index(self):
+        """Scarta l'indice FAISS (verrà ricostruito in background alla prossima ricerca)"""
+        self._faiss_index = None
+        self._faiss_stale = False
+        self._faiss_generation += 1
+        self._delete_faiss_file()
+
+    def _mark_faiss_stale(self):
+        """L'indice in memoria resta in uso ma va ricostruito: quello su disco non è più valido"""
+        self._faiss_generation += 1
+        # Sempre, anche senza indice in memoria: altrimenti _get_faiss_index lo ricaricherebbe
+        # (ntotal invariato) con il vettore vecchio della riga modificata
+        self._delete_faiss_file()
+        if self._faiss_index is None:
+            return
+        self._faiss_stale = True
+        self._schedule_faiss_rebuild()
+
+    def _get_faiss_index(self):
+        """
+        Restituisce l'indice FAISS se il diario è abbastanza grande.
+        L'addestramento (HNSW-SQ / IVF-PQ) non avviene mai durante una ricerca: se l'indice manca
+        parte la costruzione in background e nel frattempo si usa la scansione esatta.
+        """
+        if not HAS_FAISS or self._emb_matrix is None or len(self._emb_dates) < FAISS_MIN_ENTRIES:
+            return None
+
+        if self._faiss_index is not None:
+            return self._faiss_index
+
+        try:
+            if self.faiss_index_path.exists():
+                index = faiss.read_index(str(self.faiss_index_path))
+                if hasattr(index, "nprobe"):
+                    # nprobe non viene salvato su disco
+                    index.nprobe = FAISS_IVF_NPROBE
+                if index.ntotal == len(self._emb_dates):
+                    self._faiss_index = index
+                    return index
+                # Indice non allineato alle righe attuali: verrà sovrascritto dalla ricostruzione
+                self._delete_faiss_file()
+        except Exception as e:
+            print(f"Errore lettura indice FAISS: {e}")
+
+        self._schedule_faiss_rebuild()
+        return None
+
+    def _schedule_faiss_rebuild(self):
+        """Avvia (se non è già in corso) la costruzione dell'indice FAISS in un thread separato"""
+        if self._faiss_building:
+            return
+        self._faiss_building = True
+        threading.Thread(target=self._rebuild_faiss_index, name="faiss-rebuild", daemon=True).start()
+
+    def _rebuild_faiss_index(self):
+        """
+        Costruisce l'indice da una copia della matrice, senza tenere il lock durante l'addestramento.
+        Le righe aggiunte nel frattempo vengono inserite alla fine; se invece è cambiata
+        una riga esistente il risultato è scartato e si riparte.
+        """
+        while True:
+            with self._lock:
+                if (self._emb_matrix is None or len(self._emb_dates) < FAISS_MIN_ENTRIES
+                        or (self._faiss_index is not None and not self._faiss_stale)):
+                    self._faiss_building = False
+                    return
+                generation = self._faiss_generation
+                matrix = np.array(self._emb_matrix, dtype=np.float32)
+                rows = len(matrix)
+
+            try:
+                index = self._build_faiss_index(matrix)
+            except Exception as e:
+                print(f"Errore indice FAISS, uso scansione lineare: {e}")
+                with self._lock:
+                    self._faiss_building = False
+                return
+
+            with self._lock:
+                if generation != self._faiss_generation or self._emb_matrix is None:
+                    continue
+                if len(self._emb_dates) > rows:
+                    index.add(np.ascontiguousarray(self._emb_matrix[rows:]))
+                self._faiss_index = index
+                self._faiss_stale = False
+                self._faiss_building = False
+                try:
+                    faiss.write_index(index, str(self.faiss_index_path))
+                except Exception as e:
+                    print(f"Errore salvataggio indice FAISS: {e}")
+                return
+
+    @staticmethod
+    def _build_faiss_index(matrix):
+        """
+        Costruisce l'indice FAISS adatto alla dimensione del diario.
+        Le righe sono già normalizzate: inner product = similarità coseno.
+        """
+        count, dim = matrix.shape
+        if count >= FAISS_IVFPQ_MIN_ENTRIES and dim % 8 == 0:
+            # Diari enormi: cluster IVF (si visitano solo nprobe liste) + Product Quantization (dim/8 byte per vettore)
+            nlist = int(np.sqrt(count))
+            index = faiss.index_factory(dim, f"IVF{nlist},PQ{dim // 8}", faiss.METRIC_INNER_PRODUCT)
+            index.train(matrix)
+            index.nprobe = FAISS_IVF_NPROBE
+            label = f"IVF{nlist},PQ{dim // 8}"
+        else:
+            # Vettori quantizzati a 8 bit per dimensione: indice 4x più piccolo, recall quasi invariata
+            index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT)
+            index.train(matrix)
+            label = "HNSW (int8)"
+
+        index.add(matrix)
+        print(f"  Indice FAISS {label} costruito: {index.ntotal} vettori")
+        return index
+
+    def _save_embeddings(self):
+        """Riscrive l'intero vector store (.vec float32 grezzo + .ids.jsonl) e lo riapre in memory-map"""
+        if not self.embeddings or self._emb_matrix is None:
             return
 
         try:
-            dates = list(self.embeddings.keys())
-            vectors = np.array(list(self.embeddings.values()))
-            np.savez_compressed(self.embeddings_path, dates=dates, vectors=vectors)
+            self._release_vector_store()
+            dim = self._emb_matrix.shape[1]
+            np.ascontiguousarray(self._emb_matrix, dtype=np.float32).tofile(self.vectors_path)
+            with open(self.vector_ids_path, "w", encoding="utf-8") as f:
+                f.write(_json_dumps({"dim": dim}) + "\n")
+                f.write("".join(_json_dumps({"date": date}) + "\n" for date in self._emb_dates))
+            self._map_vector_store(dim)
         except Exception as e:
             print(f"Errore salvataggio embeddings: {e}")
 
@@ -163,15 +838,17 @@ class MemvidMemory:
             return
 
         print(f"Generazione {len(missing)} embeddings mancanti...")
-        for date in missing:
-            content = self.entries[date]
-            try:
-                embedding = self.embedding_model.encode(content, convert_to_numpy=True)
+        try:
+            vectors = self._encode_documents([self.entries[date] for date in missing])
+            for date, embedding in zip(missing, vectors):
                 self.embeddings[date] = embedding
-            except Exception as e:
-                print(f"  Errore embedding per {date}: {e}")
+                self._emb_source[date] = self.entries[date]
+        except Exception as e:
+            print(f"  Errore generazione embeddings: {e}")
 
         if missing:
+            self._rebuild_emb_matrix()
+            self._invalidate_faiss_index()
             self._save_embeddings()
             print(f"  Embeddings aggiornati: {len(self.embeddings)} totali")
 
@@ -205,8 +882,11 @@ class MemvidMemory:
         # Elimina file esistenti
         if self.memvid_path.exists():
             self.memvid_path.unlink()
-        if self.embeddings_path.exists():
-            self.embeddings_path.unlink()
+        self._delete_vector_store()
+        self.embeddings = {}
+        self._emb_source = {}
+        self._rebuild_emb_matrix()
+        self._invalidate_faiss_index()
 
         # Ricrea
         self._create_and_index()
@@ -219,30 +899,35 @@ class MemvidMemory:
             enable_vec=True  # Required for put_many(), we also use separate sentence-transformer embeddings
         )
 
-        documents = []
-        for file_path in sorted(self.journal_dir.glob("*.txt")):
-            if file_path.name.startswith("."):
-                continue
+        def read_file(file_path: Path):
+            try:
+                return file_path, read_journal_text(file_path), None
+            except Exception as e:
+                return file_path, None, e
+
+        # Letture in parallelo (I/O-bound, il GIL viene rilasciato), elaborazione in ordine
+        paths = list_journal_files(self.journal_dir)
+        with ThreadPoolExecutor(max_workers=FILE_READ_WORKERS) as executor:
+            file_contents = list(executor.map(read_file, paths))
 
+        documents = []
+        for file_path, content, read_error in file_contents:
             try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read().strip()
+                if read_error:
+                    raise read_error
 
                 if not content:
                     continue
 
                 # Estrai data dal nome file
-                date_match = re.match(r'(\d{4})-(\d{2})-(\d{2})', file_path.name)
+                date_match = _FILE_DATE_RE.match(file_path.name)
                 if date_match:
-                    entry_date = datetime(
-                        int(date_match.group(1)),
-                        int(date_match.group(2)),
-                        int(date_match.group(3))
-                    )
+                    date_str = date_match.group(0)
+                    timestamp = int(datetime.fromisoformat(date_str).timestamp())
                 else:
-                    entry_date = datetime.now()
-
-                date_str = entry_date.strftime("%Y-%m-%d")
+                    now = datetime.now()
+                    date_str = now.strftime("%Y-%m-%d")
+                    timestamp = int(now.timestamp())
 
                 doc = {
                     "title": f"Diario {date_str}",
@@ -250,12 +935,12 @@ class MemvidMemory:
                     "text": content,
                     "metadata": {"date": date_str, "full_text": content},  # Salva testo completo
                     "tags": ["diario"],
-                    "timestamp": int(entry_date.timestamp())
+                    "timestamp": timestamp
                 }
                 documents.append(doc)
 
                 # Carica anche in entries dict
-                self.entries[date_str] = content
+                self._set_entry(date_str, content)
 
             except Exception as e:
                 print(f"Errore file {file_path.name}: {e}")
@@ -267,15 +952,16 @@ class MemvidMemory:
             # Genera embeddings per ricerca semantica
             if self.embedding_model:
                 print("Generazione embeddings semantici...")
-                for doc in documents:
-                    date_str = doc['metadata']['date']
-                    text = doc['text']
-                    try:
-                        embedding = self.embedding_model.encode(text, convert_to_numpy=True)
-                        self.embeddings[date_str] = embedding
-                    except Exception as e:
-                        print(f"  Errore embedding per {date_str}: {e}")
+                try:
+                    vectors = self._encode_documents([doc['text'] for doc in documents])
+                    for doc, embedding in zip(documents, vectors):
+                        self.embeddings[doc['metadata']['date']] = embedding
+                        self._emb_source[doc['metadata']['date']] = doc['text']
+                except Exception as e:
+                    print(f"  Errore generazione embeddings: {e}")
 
+                self._rebuild_emb_matrix()
+                self._invalidate_faiss_index()
                 self._save_embeddings()
                 print(f"  Salvati {len(self.embeddings)} embeddings")
 
@@ -291,23 +977,44 @@ class MemvidMemory:
             stats = self.mem.stats()
             frame_count = stats.get('frame_count', 0)
 
-            timeline = self.mem.timeline(limit=frame_count)
+            # Chiedi i metadata insieme alla timeline (una sola chiamata SDK);
+            # le versioni di Memvid che non lo supportano richiedono un frame() per item
+            try:
+                timeline = self.mem.timeline(limit=frame_count, with_metadata=True)
+            except TypeError:
+                timeline = self.mem.timeline(limit=frame_count)
 
             for item in timeline:
-                uri = item.get('uri', '')
-                if not uri:
+                # I frame delle emozioni hanno anch'essi una data ma non sono entries
+                if item.get('title', '').startswith('Emozioni '):
                     continue
 
-                # Ottieni frame completo per metadata
-                frame = self.mem.frame(uri)
-                metadata = frame.get('extra_metadata', {})
+                uri = item.get('uri', '')
+                frame = None
+                metadata = item.get('extra_metadata')
+                if metadata is None:
+                    if not uri:
+                        continue
+
+                    # Ottieni frame completo per metadata
+                    frame = self.mem.frame(uri)
+                    metadata = frame.get('extra_metadata', {})
 
-                # Estrai data e full_text dai metadata
                 date_str = metadata.get('date', '').strip('"')
+                if not date_str:
+                    continue
+
+                # Il testo completo sta in metadata.full_text: timeline e frame possono
+                # restituire solo un'anteprima o un chunk del testo, mai usarli se c'è full_text.
+                # Il testo del frame serve solo per i frame scritti senza full_text.
                 full_text = metadata.get('full_text', '').strip('"')
+                if not full_text and uri:
+                    if frame is None:
+                        frame = self.mem.frame(uri)
+                    full_text = frame.get('text', '')
 
-                if date_str and full_text:
-                    self.entries[date_str] = full_text
+                if full_text:
+                    self._set_entry(date_str, full_text)
 
             print(f"  Caricate {len(self.entries)} entries da Memvid")
 
@@ -318,19 +1025,58 @@ class MemvidMemory:
 
     def _load_entries_from_files(self):
         """Fallback: carica entries dai file .txt"""
-        for file_path in self.journal_dir.glob("*.txt"):
-            if file_path.name.startswith(".") or "_emotions" in file_path.name:
+        # os.scandir: un solo passaggio sulla directory, senza un Path per ogni voce
+        try:
+            with os.scandir(self.journal_dir) as it:
+                names = [e.name for e in it if e.name.endswith(".txt")]
+        except OSError:
+            return
+
+        for name in names:
+            if name.startswith(".") or "_emotions" in name:
                 continue
 
-            date_match = re.match(r'(\d{4}-\d{2}-\d{2})', file_path.name)
+            date_match = _HIT_DATE_RE.match(name)
             if date_match:
-                date_str = date_match.group(1)
+                date_str = date_match.group(0)
                 try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        self.entries[date_str] = f.read().strip()
+                    with open(self.journal_dir / name, "r", encoding="utf-8") as f:
+                        self._set_entry(date_str, f.read().strip())
                 except:
                     pass
 
+    def _set_entry(self, date: str, content: str):
+        """Registra una entry aggiornando anche le cache usate dalla ricerca diretta"""
+        # Rimuovi le posting della versione precedente dell'entry
+        old_lower = self._entries_lower.get(date)
+        if old_lower is not None:
+            for token in set(_TOKEN_RE.findall(old_lower)):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(date, None)
+                    if not postings:
+                        del self._postings[token]
+
+        if date not in self.entries:
+            bisect.insort(self._sorted_dates, date)
+        self.entries[date] = content
+        content_lower = content.lower()
+        self._entries_lower[date] = content_lower
+        for token, freq in Counter(_TOKEN_RE.findall(content_lower)).items():
+            self._postings.setdefault(token, {})[date] = freq
+
+    @_synchronized
+    def get_entries_in_range(self, start_date: Optional[str] = None,
+                             end_date: Optional[str] = None) -> Dict[str, str]:
+        """
+        Entries con data compresa tra start_date e end_date (inclusi, YYYY-MM-DD).
+        Usa l'elenco ordinato delle date: costo proporzionale al risultato, non al diario.
+        """
+        lo = bisect.bisect_left(self._sorted_dates, start_date) if start_date else 0
+        hi = bisect.bisect_right(self._sorted_dates, end_date) if end_date else len(self._sorted_dates)
+        return {date: self.entries[date] for date in self._sorted_dates[lo:hi]}
+
+    @_synchronized
     def get_rich_context(self, query: Optional[str] = None, num_entries: int = 10) -> str:
         """
         Ottiene contesto ricco per il chatbot.
@@ -390,6 +1136,7 @@ class MemvidMemory:
                 parts.append(f"[{date}]\n{content}")
         return "\n\n---\n\n".join(parts)
 
+    @_synchronized
     def get_similar_entries(self, query: str, top_n: int = 5) -> List[Dict[str, Any]]:
         """
         Trova entries simili a una query.
@@ -402,6 +1149,9 @@ class MemvidMemory:
         Returns:
             Lista di dizionari con date, content, score
         """
+        if len(query.strip()) < MIN_QUERY_LENGTH:
+            return []
+
         all_results = {}  # Usa dict per deduplicare per data
 
         # 1. Ricerca SEMANTICA (priorità massima per comprensione concettuale)
@@ -424,13 +1174,17 @@ class MemvidMemory:
         # 3. BM25 (aggiunge risultati se non già presenti)
         if self.mem:
             try:
-                results = self.mem.find(query, k=top_n)
-                hits = results.get('hits', [])
+                hits = self._find_hits_cached(query, top_n)
 
                 for hit in hits:
                     title = hit.get('title', '')
-                    date_match = re.search(r'\d{4}-\d{2}-\d{2}', title)
-                    date_str = date_match.group(0) if date_match else 'unknown'
+                    if title.startswith('Diario '):
+                        # Titolo canonico "Diario YYYY-MM-DD": basta lo slicing
+                        date_str = title[7:17]
+                    else:
+                        # Vecchi dati con titoli diversi
+                        date_match = _HIT_DATE_RE.search(title)
+                        date_str = date_match.group(0) if date_match else 'unknown'
 
                     # Aggiungi solo se non già trovato
                     if date_str not in all_results:
@@ -443,45 +1197,81 @@ class MemvidMemory:
             except Exception as e:
                 print(f"BM25 search error: {e}")
 
-        # Ordina per score decrescente e restituisci top_n
-        similar = sorted(all_results.values(), key=lambda x: -x['score'])
-        return similar[:top_n]
+        # Top_n per score decrescente (heap: non serve ordinare tutti i candidati)
+        return heapq.nlargest(top_n, all_results.values(), key=lambda x: x['score'])
+
+    def _find_hits_cached(self, query: str, k: int) -> tuple:
+        """Hit BM25 in cache per (query, k)"""
+        return _cache_get(self._hits_cache, (query, k), lambda: self._find_hits(query, k))
+
+    def _encode_query_cached(self, query: str) -> bytes:
+        """Embedding della query in cache (retry e rigenerazioni del chatbot)"""
+        return _cache_get(self._query_cache, query, lambda: self._encode_query(query))
+
+    def _find_hits(self, query: str, k: int) -> tuple:
+        """Hit BM25 di Memvid per la query (tupla: immutabile, adatta alla cache)"""
+        return tuple(self.mem.find(query, k=k).get('hits', []))
+
+    def _encode_query(self, query: str) -> bytes:
+        """Embedding normalizzato della query, serializzato in bytes (immutabile, adatto alla cache)"""
+        embedding = self._encode(query, convert_to_numpy=True)
+        return self._normalize_vector(embedding).tobytes()
 
     def _semantic_search(self, query: str, top_n: int = 5) -> List[Dict[str, Any]]:
         """
         Ricerca semantica usando embeddings.
         Trova entries concettualmente simili alla query.
         """
-        if not self.embedding_model or not self.embeddings:
+        if not self.embedding_model or self._emb_matrix is None:
             print(f"[SEARCH] Semantic search SKIPPED - model:{bool(self.embedding_model)}, embeddings:{len(self.embeddings) if self.embeddings else 0}")
             return []
 
         try:
             print(f"[SEARCH] Semantic search START for: '{query[:50]}...' in {len(self.embeddings)} embeddings")
-            # Genera embedding della query
-            query_embedding = self.embedding_model.encode(query, convert_to_numpy=True)
-
-            # Calcola similarità coseno con tutti gli embeddings
-            results = []
-            for date, doc_embedding in self.embeddings.items():
-                # Similarità coseno
-                similarity = np.dot(query_embedding, doc_embedding) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(doc_embedding)
-                )
-
+            # Genera embedding della query (normalizzato, in cache per query ripetute)
+            query_embedding = np.frombuffer(self._encode_query_cached(query), dtype=np.float32).copy()
+
+            k = min(top_n, len(self._emb_dates))
+            if k <= 0:
+                return []
+
+            faiss_index = self._get_faiss_index()
+            if faiss_index is not None:
+                # Ricerca approssimata HNSW (risultati già ordinati per similarità)
+                scores, ids = faiss_index.search(query_embedding.reshape(1, -1), k)
+                candidates = [(int(i), float(sc)) for i, sc in zip(ids[0], scores[0]) if i >= 0]
+            else:
+                if len(self._emb_dates) >= FAISS_MIN_ENTRIES:
+                    # Diario grande senza FAISS: preselezione con codici binari (distanza di Hamming),
+                    # poi similarità esatta solo sui candidati
+                    pool = self._binary_candidates(query_embedding, k * BINARY_RERANK_FACTOR)
+                    sims = self._emb_matrix[pool] @ query_embedding
+                else:
+                    pool = None
+                    # Similarità coseno con tutti gli embeddings in una sola moltiplicazione matrice-vettore
+                    sims = self._emb_matrix @ query_embedding
+                # Solo candidati sopra soglia, poi top-k parziale: gli altri non arrivano mai in Python
+                top_idx = np.flatnonzero(sims > 0.2)
+                if len(top_idx) > k:
+                    top_idx = top_idx[np.argpartition(-sims[top_idx], k - 1)[:k]]
+                top_idx = top_idx[np.argsort(-sims[top_idx])]
+                rows = pool[top_idx] if pool is not None else top_idx
+                candidates = [(int(r), float(sims[i])) for r, i in zip(rows, top_idx)]
+
+            top_results = []
+            for i, similarity in candidates:
                 # Aggiungi solo se similarità significativa (> 0.2)
-                if similarity > 0.2:
-                    content = self.entries.get(date, '')[:500]
-                    results.append({
-                        'date': date,
-                        'content': content + "..." if len(self.entries.get(date, '')) > 500 else content,
-                        'score': float(similarity),
-                        'title': f"Diario {date}"
-                    })
-
-            # Ordina per similarità decrescente
-            results.sort(key=lambda x: -x['score'])
-            top_results = results[:top_n]
+                if similarity <= 0.2:
+                    break
+                date = self._emb_dates[i]
+                full_text = self.entries.get(date, '')
+                top_results.append({
+                    'date': date,
+                    'content': full_text[:500] + "..." if len(full_text) > 500 else full_text,
+                    'score': similarity,
+                    'title': f"Diario {date}"
+                })
+
             scores_preview = [f"{r['score']:.2f}" for r in top_results[:3]]
             print(f"[SEARCH] Semantic search FOUND {len(top_results)} results (scores: {scores_preview})")
             return top_results
@@ -506,6 +1296,7 @@ class MemvidMemory:
         # TODO: Implementare con memories() di Memvid
         return {}
 
+    @_synchronized
     def add_entry(self, date: str, content: str) -> bool:
         """
         Aggiunge una nuova voce al diario.
@@ -521,14 +1312,19 @@ class MemvidMemory:
             return False
 
         # Aggiorna entries dict (sempre)
-        self.entries[date] = content
+        self._set_entry(date, content)
 
         # Genera e salva embedding per ricerca semantica
         if self.embedding_model:
             try:
-                embedding = self.embedding_model.encode(content, convert_to_numpy=True)
-                self.embeddings[date] = embedding
-                self._save_embeddings()
+                # Confronto con il testo da cui è stato calcolato il vettore, non con l'ultimo salvato:
+                # con l'autosave tante piccole modifiche sommate devono comunque portare a un nuovo encoding.
+                # Il vettore riusato non va nella cache su disco: non corrisponde al nuovo testo.
+                source = self._emb_source.get(date)
+                if not (date in self.embeddings and source is not None and _is_near_duplicate(source, content)):
+                    self.embeddings[date] = self._encode_documents([content])[0]
+                    self._emb_source[date] = content
+                    self._update_emb_matrix(date)
             except Exception as e:
                 print(f"Errore generazione embedding: {e}")
 
@@ -543,12 +1339,14 @@ class MemvidMemory:
                     tags=["diario"]
                 )
                 self.mem.seal()
+                self._hits_cache.clear()
             except Exception as e:
                 # Non bloccare se memvid fallisce - i dati sono nei .txt
                 print(f"Memvid put opzionale fallito: {e}")
 
         return True
 
+    @_synchronized
     def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Ricerca full-text nel diario.
@@ -561,6 +1359,9 @@ class MemvidMemory:
         Returns:
             Lista di risultati con snippet e score
         """
+        if len(query.strip()) < MIN_QUERY_LENGTH:
+            return []
+
         # Prima prova BM25
         results = self.get_similar_entries(query, top_n=limit)
 
@@ -576,39 +1377,25 @@ class MemvidMemory:
         Estrae parole chiave dalla query e cerca ciascuna.
         Supporta anche ricerca per mese (ottobre, settembre, etc.)
         """
-        query_lower = query.lower()
         results = []
-
-        # Mappa mesi italiani a numeri
-        mesi_map = {
-            'gennaio': '01', 'febbraio': '02', 'marzo': '03', 'aprile': '04',
-            'maggio': '05', 'giugno': '06', 'luglio': '07', 'agosto': '08',
-            'settembre': '09', 'ottobre': '10', 'novembre': '11', 'dicembre': '12'
-        }
-
-        # Stopwords italiane da ignorare
-        stopwords = {'il', 'lo', 'la', 'i', 'gli', 'le', 'un', 'uno', 'una',
-                     'di', 'a', 'da', 'in', 'con', 'su', 'per', 'tra', 'fra',
-                     'che', 'chi', 'cosa', 'come', 'dove', 'quando', 'perché',
-                     'e', 'o', 'ma', 'se', 'non', 'più', 'anche', 'solo',
-                     'mi', 'ti', 'ci', 'vi', 'si', 'me', 'te', 'lui', 'lei',
-                     'noi', 'voi', 'loro', 'mio', 'tuo', 'suo', 'nostro',
-                     'questo', 'quello', 'quale', 'quanto', 'tutto', 'ogni',
-                     'conosci', 'sai', 'dimmi', 'parlami', 'raccontami', 'dici'}
-
-        # Estrai parole chiave significative dalla query
-        words = re.findall(r'\b[a-zA-ZàèéìòùÀÈÉÌÒÙ]+\b', query_lower)
-        keywords = [w for w in words if w not in stopwords and len(w) >= 3]
-
-        # Controlla se c'è un mese nella query
-        month_filter = None
-        for mese, num in mesi_map.items():
-            if mese in query_lower:
-                month_filter = f"-{num}-"
-                keywords.append(mese)  # Aggiungi anche il mese come keyword
-                break
-
-        for date, content in self.entries.items():
+        scored = []  # (score, data, posizione del match migliore)
+        keywords, month_filter = _parse_query(query)
+
+        # Candidati: entries che contengono almeno una keyword (dall'indice invertito)
+        # Pattern a parola intera (compilato una volta per keyword): lo snippet deve cadere
+        # sul token che ha prodotto il match, non su una sottostringa (es. "ore" in "amore")
+        keyword_postings = [
+            (kw, self._postings.get(kw, {}), re.compile(r'\b' + re.escape(kw) + r'\b'))
+            for kw in keywords
+        ]
+        candidates = set()
+        for _, postings, _ in keyword_postings:
+            candidates.update(postings)
+        if month_filter:
+            candidates.update(date for date in self._sorted_dates if month_filter in date)
+
+        for date in sorted(candidates):
+            content_lower = self._entries_lower[date]
             matched = False
             score = 0
             best_idx = 0
@@ -618,41 +1405,45 @@ class MemvidMemory:
                 matched = True
                 score = 15.0
 
-            # Cerca ogni keyword nel contenuto
-            content_lower = content.lower()
-            for keyword in keywords:
-                if keyword in content_lower:
-                    count = content_lower.count(keyword)
+            # Somma i punteggi delle keyword presenti nell'entry
+            for keyword, postings, pattern in keyword_postings:
+                count = postings.get(date)
+                if count:
                     # Parole più lunghe = più specifiche = score più alto
                     word_score = count * (5.0 + len(keyword))
                     score += word_score
                     matched = True
                     # Trova la posizione per lo snippet
-                    idx = content_lower.find(keyword)
-                    if idx > best_idx:
-                        best_idx = idx
+                    match = pattern.search(content_lower)
+                    if match and match.start() > best_idx:
+                        best_idx = match.start()
 
             if matched:
-                # Estrai snippet intorno al match migliore
-                start = max(0, best_idx - 100)
-                end = min(len(content), best_idx + 300)
-                snippet = content[start:end]
-                if start > 0:
-                    snippet = "..." + snippet
-                if end < len(content):
-                    snippet = snippet + "..."
-
-                results.append({
-                    'date': date,
-                    'content': snippet if snippet.strip() else content[:300] + "...",
-                    'score': score,
-                    'title': f"Diario {date}"
-                })
+                scored.append((score, date, best_idx))
+
+        # Solo i primi `limit` per score decrescente ricevono lo snippet:
+        # per gli altri candidati non serve affettare il testo
+        for score, date, best_idx in heapq.nlargest(limit, scored, key=lambda x: x[0]):
+            content = self.entries[date]
+            # Estrai snippet intorno al match migliore
+            start = max(0, best_idx - 100)
+            end = min(len(content), best_idx + 300)
+            snippet = content[start:end]
+            if start > 0:
+                snippet = "..." + snippet
+            if end < len(content):
+                snippet = snippet + "..."
+
+            results.append({
+                'date': date,
+                'content': snippet if snippet.strip() else content[:300] + "...",
+                'score': score,
+                'title': f"Diario {date}"
+            })
 
-        # Ordina per score decrescente
-        results.sort(key=lambda x: -x['score'])
-        return results[:limit]
+        return results
 
+    @_synchronized
     def stats(self) -> Dict[str, Any]:
         """Restituisce statistiche del sistema di memoria"""
         if not self.mem:
@@ -662,6 +1453,7 @@ class MemvidMemory:
 
     # ==================== GESTIONE EMOZIONI ====================
 
+    @_synchronized
     def save_emotions(self, date: str, emotions: Dict[str, float],
                       daily_insights: Optional[Dict] = None,
                       profile_updates: Optional[Dict] = None) -> bool:
@@ -694,14 +1486,13 @@ class MemvidMemory:
             # Prova anche a salvare in Memvid (per ricerca)
             if self.mem:
                 try:
-                    import json
                     metadata = {
                         'date': date,
                         'type': 'emotions',
-                        'emotions': json.dumps(emotions)
+                        'emotions': _json_dumps(emotions)
                     }
                     if daily_insights:
-                        metadata['daily_insights'] = json.dumps(daily_insights)
+                        metadata['daily_insights'] = _json_dumps(daily_insights)
 
                     emotion_text = ", ".join([f"{k}: {v:.1f}" for k, v in emotions.items() if v > 0])
                     self.mem.put(
@@ -712,6 +1503,7 @@ class MemvidMemory:
                         tags=["emozioni", date]
                     )
                     self.mem.seal()
+                    self._hits_cache.clear()
                 except Exception as e:
                     print(f"Memvid emotions save fallito (JSON backup OK): {e}")
 
@@ -721,28 +1513,16 @@ class MemvidMemory:
             print(f"Errore salvataggio emozioni: {e}")
             return False
 
-    def get_emotions(self, date: str) -> Optional[Dict[str, float]]:
+    def _load_emotions_from_memvid(self):
         """
-        Recupera le emozioni per una data specifica.
-
-        Args:
-            date: Data in formato YYYY-MM-DD
-
-        Returns:
-            Dizionario emozioni o None se non trovato
+        Popola la cache emozioni con tutti i frame "Emozioni {date}" di Memvid
+        in un solo passaggio sulla timeline (le date già in cache hanno priorità).
         """
-        # Prima controlla la cache in memoria
-        if date in self._emotions_cache:
-            cached = self._emotions_cache[date]
-            if cached and 'emotions' in cached:
-                return cached['emotions']
-
+        self._emotions_cache_built = True
         if not self.mem:
-            return None
+            return
 
         try:
-            import json
-
             # Itera sulla timeline invece di usare find() (che richiede vector index)
             stats = self.mem.stats()
             frame_count = stats.get('frame_count', 0)
@@ -750,36 +1530,59 @@ class MemvidMemory:
 
             for item in timeline:
                 title = item.get('title', '')
-                if title == f"Emozioni {date}":
-                    uri = item.get('uri', '')
-                    if uri:
-                        frame = self.mem.frame(uri)
-                        metadata = frame.get('extra_metadata', {})
-                        emotions_str = metadata.get('emotions', '')
-                        if emotions_str:
-                            # Memvid aggiunge virgolette extra, decodifica due volte se necessario
-                            try:
-                                # Prima decodifica (rimuove escape delle virgolette)
-                                decoded = json.loads(emotions_str)
-                                # Se è ancora una stringa, decodifica ancora
-                                if isinstance(decoded, str):
-                                    decoded = json.loads(decoded)
-                                # Salva in cache
-                                self._emotions_cache[date] = {'emotions': decoded}
-                                return decoded
-                            except:
-                                # Fallback: prova a pulire manualmente
-                                clean = emotions_str.strip('"').replace('\\"', '"')
-                                emotions = json.loads(clean)
-                                self._emotions_cache[date] = {'emotions': emotions}
-                                return emotions
+                if not title.startswith("Emozioni "):
+                    continue
+                date = title[len("Emozioni "):]
+                uri = item.get('uri', '')
+                if not uri or date in self._emotions_cache:
+                    continue
 
-            return None
+                frame = self.mem.frame(uri)
+                metadata = frame.get('extra_metadata', {})
+
+                result = {}
+
+                # Parse emotions
+                emotions = _decode_json_field(metadata.get('emotions', ''))
+                if emotions:
+                    result['emotions'] = emotions
+
+                # Parse daily_insights
+                insights = _decode_json_field(metadata.get('daily_insights', ''))
+                if insights:
+                    result['daily_insights'] = insights
+
+                # Parse profile_updates
+                profile = _decode_json_field(metadata.get('profile_updates', ''))
+                if profile:
+                    result['profile_updates'] = profile
+
+                if result:
+                    self._emotions_cache[date] = result
 
         except Exception as e:
-            print(f"Errore recupero emozioni per {date}: {e}")
-            return None
+            print(f"Errore caricamento emozioni da Memvid: {e}")
+
+    @_synchronized
+    def get_emotions(self, date: str) -> Optional[Dict[str, float]]:
+        """
+        Recupera le emozioni per una data specifica.
+
+        Args:
+            date: Data in formato YYYY-MM-DD
+
+        Returns:
+            Dizionario emozioni o None se non trovato
+        """
+        if date not in self._emotions_cache and not self._emotions_cache_built:
+            self._load_emotions_from_memvid()
 
+        cached = self._emotions_cache.get(date)
+        if cached and cached.get('emotions'):
+            return cached['emotions']
+        return None
+
+    @_synchronized
     def get_emotions_for_week(self, dates: List[str]) -> Dict[str, Dict[str, float]]:
         """
         Recupera le emozioni per una lista di date (per la matrice settimanale).
@@ -799,6 +1602,7 @@ class MemvidMemory:
                 result[date] = {}
         return result
 
+    @_synchronized
     def get_full_analysis(self, date: str) -> Optional[Dict[str, Any]]:
         """
         Recupera l'analisi completa (emozioni + insights + profile) per una data.
@@ -809,73 +1613,28 @@ class MemvidMemory:
         Returns:
             Dizionario con emotions, daily_insights, profile_updates
         """
-        # Prima controlla la cache in memoria
-        if date in self._emotions_cache:
-            cached = self._emotions_cache[date]
-            if cached:
-                return cached
+        if date not in self._emotions_cache and not self._emotions_cache_built:
+            self._load_emotions_from_memvid()
 
-        if not self.mem:
-            return None
+        return self._emotions_cache.get(date) or None
 
-        def decode_json_field(value: str):
-            """Decodifica un campo JSON che potrebbe essere doppiamente codificato"""
-            if not value:
-                return None
+    @_synchronized
+    def close(self):
+        """Chiude la connessione al file Memvid e rilascia la memory-map del vector store"""
+        if self._emb_store is not None:
             try:
-                decoded = json.loads(value)
-                if isinstance(decoded, str):
-                    decoded = json.loads(decoded)
-                return decoded
-            except:
-                try:
-                    clean = value.strip('"').replace('\\"', '"')
-                    return json.loads(clean)
-                except:
-                    return None
-
-        try:
-            import json
-
-            # Itera sulla timeline invece di usare find() (che richiede vector index)
-            stats = self.mem.stats()
-            frame_count = stats.get('frame_count', 0)
-            timeline = self.mem.timeline(limit=frame_count)
-
-            for item in timeline:
-                if item.get('title') == f"Emozioni {date}":
-                    uri = item.get('uri', '')
-                    if uri:
-                        frame = self.mem.frame(uri)
-                        metadata = frame.get('extra_metadata', {})
-
-                        result = {}
-
-                        # Parse emotions
-                        emotions = decode_json_field(metadata.get('emotions', ''))
-                        if emotions:
-                            result['emotions'] = emotions
-
-                        # Parse daily_insights
-                        insights = decode_json_field(metadata.get('daily_insights', ''))
-                        if insights:
-                            result['daily_insights'] = insights
-
-                        # Parse profile_updates
-                        profile = decode_json_field(metadata.get('profile_updates', ''))
-                        if profile:
-                            result['profile_updates'] = profile
-
-                        return result if result else None
-
-            return None
-
-        except Exception as e:
-            print(f"Errore recupero analisi per {date}: {e}")
-            return None
+                self._emb_store.flush()
+            except Exception as e:
+                print(f"Errore flush vector store: {e}")
+        # Nessuna vista deve restare viva: su Windows il file .vec non si può eliminare finché è mappato
+        self._emb_store = None
+        self._emb_matrix = None
+        self._emb_bits = None
+        self.embeddings = {}
+        self._faiss_index = None
+        self._query_cache.clear()
+        self._hits_cache.clear()
 
-    def close(self):
-        """Chiude la connessione al file Memvid"""
         if self.mem:
             self.mem.close()
             self.mem = None
@@ -5,15 +5,71 @@ Usa embeddings locali (nessuna API key richiesta).
 """
 
 import os
-import re
+import inspect
 from pathlib import Path
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import memvid_sdk
 
+from journal_files import list_journal_files, parse_date_from_filename, read_journal_text
+
 # Configurazione
 JOURNAL_DIR = Path(__file__).parent / "journal"
 OUTPUT_FILE = Path(__file__).parent / "reminor_memory_vec.mv2"
 OLD_FILE = Path(__file__).parent / "reminor_memory.mv2"
+# Documenti per batch di embedding (una forward pass del modello per batch)
+EMBEDDING_BATCH_SIZE = 32
+# Thread per leggere i file del diario in parallelo
+FILE_READ_WORKERS = 8
+
+def supports_batch_size(put_many) -> bool:
+    """True se put_many dell'SDK accetta il parametro batch_size (controllato sulla firma, senza chiamarlo)"""
+    try:
+        params = inspect.signature(put_many).parameters
+    except (TypeError, ValueError):
+        # Firma non disponibile (metodo nativo): si inseriscono i blocchi senza batch_size
+        return False
+    return "batch_size" in params or any(
+        p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()
+    )
+
+def put_many_batched(mem, documents, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Inserisce i documenti chiedendo a Memvid di calcolare gli embeddings a batch.
+    Se l'SDK non accetta batch_size, spezza i documenti in blocchi e li inserisce a gruppi.
+    Il supporto è verificato prima di inserire: un TypeError dell'SDK a metà inserimento
+    non deve far ripetere l'inserimento (frame duplicati), quindi viene propagato.
+    """
+    if supports_batch_size(mem.put_many):
+        return mem.put_many(documents, batch_size=batch_size)
+
+    frame_ids = []
+    for start in range(0, len(documents), batch_size):
+        frame_ids.extend(mem.put_many(documents[start:start + batch_size]))
+    return frame_ids
+
+def load_doc(file_path: Path):
+    """Legge un file del diario e prepara il documento Memvid (None se vuoto o illeggibile)"""
+    try:
+        content = read_journal_text(file_path)
+
+        if not content:
+            return None
+
+        # Estrai data dal nome file
+        date_str, timestamp = parse_date_from_filename(file_path.name)
+
+        return {
+            "title": f"Diario {date_str}",
+            "label": "diary",
+            "text": content,
+            "metadata": {"date": date_str, "filename": file_path.name},
+            "tags": ["diario"],
+            "timestamp": timestamp
+        }
+
+    except Exception as e:
+        print(f"   Errore file {file_path.name}: {e}")
+        return None
 
 def rebuild_with_vectors():
     print("=" * 60)
@@ -43,53 +99,27 @@ def rebuild_with_vectors():
 
     # Carica tutti i file .txt
     print("\n2. Caricamento file diario...")
-    documents = []
-
-    for file_path in sorted(JOURNAL_DIR.glob("*.txt")):
-        if file_path.name.startswith("."):
-            continue
-
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-
-            if not content:
-                continue
-
-            # Estrai data dal nome file
-            date_match = re.match(r'(\d{4})-(\d{2})-(\d{2})', file_path.name)
-            if date_match:
-                entry_date = datetime(
-                    int(date_match.group(1)),
-                    int(date_match.group(2)),
-                    int(date_match.group(3))
-                )
-            else:
-                entry_date = datetime.now()
-
-            date_str = entry_date.strftime("%Y-%m-%d")
-
-            doc = {
-                "title": f"Diario {date_str}",
-                "label": "diary",
-                "text": content,
-                "metadata": {"date": date_str, "filename": file_path.name},
-                "tags": ["diario"],
-                "timestamp": int(entry_date.timestamp())
-            }
-            documents.append(doc)
-
-        except Exception as e:
-            print(f"   Errore file {file_path.name}: {e}")
-
-    print(f"   Trovati {len(documents)} documenti")
+    journal_files = list_journal_files(JOURNAL_DIR)
+    print(f"   Trovati {len(journal_files)} file")
 
     # Inserisci documenti (gli embeddings vengono calcolati automaticamente)
     print("\n3. Inserimento documenti con calcolo embeddings...")
     print("   (questo potrebbe richiedere qualche secondo)")
 
+    # Pipeline: i thread leggono i file mentre Memvid calcola gli embeddings del batch precedente
+    # (map restituisce i documenti in ordine appena pronti)
+    frame_ids = []
     try:
-        frame_ids = mem.put_many(documents)
+        with ThreadPoolExecutor(max_workers=FILE_READ_WORKERS) as executor:
+            batch = []
+            for doc in executor.map(load_doc, journal_files):
+                if doc:
+                    batch.append(doc)
+                if len(batch) == EMBEDDING_BATCH_SIZE:
+                    frame_ids.extend(put_many_batched(mem, batch))
+                    batch = []
+            if batch:
+                frame_ids.extend(put_many_batched(mem, batch))
         print(f"   Inseriti {len(frame_ids)} documenti")
     except Exception as e:
         print(f"   ERRORE inserimento: {e}")
@@ -130,6 +130,7 @@ const translations = {
   'search.searching': { it: 'CERCO...', en: 'SEARCHING...' },
   'search.results': { it: 'RISULTATI:', en: 'RESULTS:' },
   'search.no_results': { it: 'Nessun risultato trovato', en: 'No results found' },
+  'search.too_short': { it: 'Inserisci almeno 2 caratteri', en: 'Enter at least 2 characters' },
   'search.score': { it: 'SCORE:', en: 'SCORE:' },
 
   // ---- CALENDAR ----
@@ -330,3 +331,30 @@ export function getEmotionShortName(apiKey, currentLocale) {
   if (!entry) return apiKey.substring(0, 3).toUpperCase();
   return entry[currentLocale] || entry['it'] || apiKey.substring(0, 3).toUpperCase();
 }
+
+// ==================== DATE FORMATTING ====================
+
+// Intl.DateTimeFormat instances are expensive to build and the header/footer
+// clocks format a time every second, so keep one formatter per locale+options.
+const dateFormatters = new Map();
+
+/**
+ * Map the app locale ('it' | 'en') to the BCP 47 tag used for formatting.
+ */
+export function getDateLocale(currentLocale) {
+  return currentLocale === 'en' ? 'en-US' : 'it-IT';
+}
+
+/**
+ * Format a Date with a cached Intl.DateTimeFormat.
+ * Same options as Date.prototype.toLocaleString().
+ */
+export function formatDate(date, currentLocale, options) {
+  const key = currentLocale + '|' + JSON.stringify(options);
+  let formatter = dateFormatters.get(key);
+  if (!formatter) {
+    formatter = new Intl.DateTimeFormat(getDateLocale(currentLocale), options);
+    dateFormatters.set(key, formatter);
+  }
+  return formatter.format(date);
+}